@@ -0,0 +1,57 @@
+"""On-disk pickle cache for parsed TOML configs.
+
+Unpickling a small dict is roughly an order of magnitude faster than
+running the TOML tokenizer, so short-lived launches (the CLI runner, the
+GUI) skip re-parsing a config that has not changed on disk. Entries live
+in ~/.cache/simplest-agent/ as ``((mtime, size), config)`` pickles and
+are rewritten whenever the source file's mtime or size moves.
+"""
+import os
+import pickle
+import hashlib
+
+_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "simplest-agent")
+
+
+def _cache_file(path):
+    # The filename carries a digest of the absolute path so configs that
+    # merely share a basename (two checkouts, say) never share an entry
+    digest = hashlib.blake2b(path.encode("utf-8"), digest_size=6).hexdigest()
+    return os.path.join(_CACHE_DIR, f"{os.path.basename(path)}.{digest}.pkl")
+
+
+def load_config_cached(path, parse_bytes):
+    """Load a config through the pickle cache, parsing only on a miss.
+
+    Args:
+        path: Path of the TOML file.
+        parse_bytes: Callable turning the file's bytes into a dict; only
+            invoked when the cache is cold or stale.
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    key = (stat.st_mtime, stat.st_size)
+    cache_file = _cache_file(path)
+
+    try:
+        with open(cache_file, "rb") as f:
+            cached_key, config = pickle.load(f)
+        if cached_key == key:
+            return config
+    except (OSError, pickle.PickleError, EOFError, ValueError):
+        pass  # Cold, unreadable, or corrupt cache: fall through and parse
+
+    with open(path, "rb") as f:
+        config = parse_bytes(f.read())
+
+    # Best-effort rewrite; an unwritable cache dir must never break loading
+    try:
+        os.makedirs(_CACHE_DIR, exist_ok=True)
+        tmp_file = cache_file + ".tmp"
+        with open(tmp_file, "wb") as f:
+            pickle.dump((key, config), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        pass
+
+    return config
@@ -0,0 +1,42 @@
+"""JIT-compiled spring energy and gradient for the Kamada-Kawai layout.
+
+The O(V^2) pair loop is the only floating-point-heavy code in the GUI.
+Compiling it with Numba runs the loop at native speed and parallelizes the
+outer iteration; cache=True persists the compiled function on disk so only
+the first run ever pays the JIT cost. Importing this module requires numba —
+gui.py falls back to its NumPy broadcast implementation when it is missing.
+"""
+import numpy as np
+from numba import njit, prange
+
+
+@njit(cache=True, fastmath=True, parallel=True)
+def energy_grad(p, ideal, strength):
+    """Return the Kamada-Kawai spring energy and its gradient.
+
+    Args:
+        p: (n, 2) contiguous array of node positions
+        ideal: (n, n) ideal pairwise distances (l_ij)
+        strength: (n, n) spring strengths (k_ij), zero on the diagonal
+
+    Returns:
+        (energy, grad) with grad shaped (n, 2)
+    """
+    n = p.shape[0]
+    energy = 0.0
+    grad = np.zeros((n, 2))
+    for i in prange(n):
+        for j in range(n):
+            if i == j:
+                continue
+            dx = p[i, 0] - p[j, 0]
+            dy = p[i, 1] - p[j, 1]
+            dist = np.sqrt(dx * dx + dy * dy)
+            if dist == 0.0:
+                dist = 1.0
+            offset = dist - ideal[i, j]
+            energy += 0.5 * strength[i, j] * offset * offset
+            coeff = 2.0 * strength[i, j] * offset / dist
+            grad[i, 0] += coeff * dx
+            grad[i, 1] += coeff * dy
+    return energy, grad
@@ -1,354 +1,590 @@
-import os
-import json
-import datetime
-from typing import Dict, Any, Callable
-
-# Choose the appropriate TOML library based on Python version
-try:
-    import tomllib  # Python 3.11+
-except ImportError:
-    import tomli as tomllib  # Python 3.10 and below, requires 'pip install tomli'
-
-from openai import OpenAI
-
-class AIAgent:
-    def __init__(self, config_path: str, api_key: str = None, dev_mode: bool = False):
-        """
-        Initialize the AI agent with a configuration file.
-        
-        Args:
-            config_path: Path to the TOML configuration file
-            api_key: OpenRouter API key (defaults to OPENAI_API_KEY environment variable)
-            dev_mode: When True, prints detailed debugging information
-        """
-        self.api_key = api_key or os.environ.get("OPENAI_API_KEY")
-        if not self.api_key:
-            raise ValueError("OpenRouter API key is required. Provide it as a parameter or set OPENAI_API_KEY environment variable.")
-        
-        # Initialize dev mode flag
-        self.dev_mode = dev_mode
-        
-        # Initialize OpenAI client with OpenRouter configuration
-        self.client = OpenAI(
-            base_url="https://openrouter.ai/api/v1",
-            api_key=self.api_key
-        )
-        
-        # Load configuration
-        self.config = self._load_config(config_path)
-        
-        # Current state and conversation history
-        self.current_state = self.config.get("initial_state", "start")
-        self.conversation_history = []
-        
-        # Separate search history
-        self.search_history = []
-        
-        # Register available actions
-        self.available_actions = {}
-        
-        # 初始化日志文件
-        self.log_timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H%M%S")
-        self.log_file = f"agent_log_{self.log_timestamp}.txt"
-        
-        # 记录初始化信息
-        self._log_info(f"Agent initialized with config from {config_path}")
-        self._log_info(f"Initial state: {self.current_state}")
-        self._log_info(f"Dev mode: {self.dev_mode}")
-        
-        if self.dev_mode:
-            print(f"[DEV] Agent initialized in dev mode with config from {config_path}")
-            print(f"[DEV] Initial state: {self.current_state}")
-            print(f"[DEV] Logging to file: {self.log_file}")
-    
-    def _log_info(self, message: str):
-        """写入信息到日志文件"""
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        with open(self.log_file, "a", encoding="utf-8") as f:
-            f.write(f"[{timestamp}] {message}\n")
-    
-    def _log_json(self, title: str, data: Any):
-        """将JSON数据格式化并写入日志文件"""
-        self._log_info(f"===== {title} =====")
-        if isinstance(data, (dict, list)):
-            try:
-                formatted_json = json.dumps(data, ensure_ascii=False, indent=2)
-                with open(self.log_file, "a", encoding="utf-8") as f:
-                    f.write(f"{formatted_json}\n")
-            except:
-                self._log_info(f"无法序列化为JSON: {str(data)}")
-        else:
-            self._log_info(str(data))
-        self._log_info("=" * (len(title) + 12))  # 12 是 "===== " 和 " =====" 的长度
-    
-    def _load_config(self, config_path: str) -> Dict:
-        """Load and parse the TOML configuration file."""
-        with open(config_path, "rb") as f:
-            return tomllib.load(f)
-    
-    def register_action(self, action_name: str, action_func: Callable):
-        """Register an external function that the agent can call."""
-        self.available_actions[action_name] = action_func
-        self._log_info(f"Registered action: {action_name}")
-        if self.dev_mode:
-            print(f"[DEV] Registered action: {action_name}")
-    
-    def _call_llm(self, prompt: str, temperature: float, model: str) -> Dict:
-        """Call the LLM API and return the response as a parsed JSON."""
-        try:
-            # Get the general description from the config
-            description = self.config.get("description", {})
-            role = description.get("role", "")
-            state_machine_logic = description.get("state_machine_logic", "")
-            work_principles = description.get("work_principles", "")
-            
-            # Format search history as a separate block if it exists
-            search_history_block = ""
-            if self.search_history:
-                search_history_block = "\n\nSEARCH HISTORY:\n"
-                for idx, search_result in enumerate(self.search_history):
-                    search_history_block += f"Search #{idx+1}: {search_result}\n\n"
-                print("[DEV] SEARCH HISTORY:")
-                for i, search_result in enumerate(self.search_history):
-                    print(f"[DEV] Search Result #{i+1}:")
-                    print(search_result)
-                    print("-"*40) 
-            
-            # Construct a complete system prompt that includes the general description and search history
-            complete_system_prompt = f"""
-{role}
-
-{state_machine_logic}
-
-{work_principles}
-
-CURRENT STATE: {self.current_state}
-{search_history_block}
-{prompt}
-"""
-            
-            # Format the system prompt and user conversation history
-            messages = [{"role": "system", "content": complete_system_prompt}]
-            
-            # Add conversation history
-            for msg in self.conversation_history:
-                messages.append(msg)
-            
-            # 记录LLM调用的详细信息
-            self._log_info(f"CALLING LLM - Model: {model}, Temperature: {temperature}")
-            self._log_info(f"Current state: {self.current_state}")
-            self._log_json("System prompt", {"role": "system", "content": complete_system_prompt})
-            
-            for i, msg in enumerate(messages):
-                if i > 0:  # 跳过系统提示，因为已经单独记录了
-                    self._log_json(f"Message {i} ({msg['role']})", msg)
-            
-            if self.search_history:
-                for i, search_result in enumerate(self.search_history):
-                    self._log_info(f"Search Result #{i+1}:")
-                    self._log_info(search_result)
-
-          
-
-            if self.dev_mode:
-                print("\n" + "="*80)
-                if self.search_history:
-                    print("[DEV] SEARCH HISTORY:")
-                    for i, search_result in enumerate(self.search_history):
-                        print(f"[DEV] Search Result #{i+1}:")
-                        print(search_result)
-                        print("-"*40)  
-
-                print("[DEV] CALLING LLM")
-                print(f"[DEV] Model: {model}")
-                print(f"[DEV] Temperature: {temperature}")
-                print("[DEV] Prompt and Messages:")
-                for i, msg in enumerate(messages):
-                    print(f"[DEV] Message {i} ({msg['role']}):")
-                    print(f"{msg['content']}")
-                    print("-"*40)  # 添加消息间的分隔符以提高可读性
-                
-
-                
-                print("="*80 + "\n")
-            
-            completion = self.client.chat.completions.create(
-                model=model,
-                temperature=temperature,
-                messages=messages,
-                max_tokens=5000,
-                response_format={"type": "json_object"}
-            )
-            
-            response_text = completion.choices[0].message.content
-            
-            # 记录LLM返回的原始响应
-            self._log_json("LLM RAW RESPONSE", response_text)
-            
-            if self.dev_mode:
-                print("\n" + "="*80)
-                print("[DEV] LLM RAW RESPONSE:")
-                print(response_text)
-                print("="*80 + "\n")
-            
-            try:
-                return json.loads(response_text)
-            except json.JSONDecodeError:
-                error_msg = f"Error: LLM response is not valid JSON: {response_text}"
-                self._log_info(error_msg)
-                if self.dev_mode:
-                    print(f"[DEV] {error_msg}")
-                return {
-                    "action": "error",
-                    "message": "I apologize, but I encountered an error processing your request.",
-                    "next_state": "error",
-                    "require_input": "1"  # Default to requiring input after an error
-                }
-        except Exception as e:
-            error_msg = f"Error calling LLM API: {e}"
-            self._log_info(error_msg)
-            if self.dev_mode:
-                print(f"[DEV] {error_msg}")
-            return {
-                "action": "error",
-                "message": f"Error occurred: {str(e)}",
-                "next_state": "error",
-                "require_input": "1"  # Default to requiring input after an error
-            }
-    
-    def run(self, user_input: str = None):
-        """
-        Run the agent's main loop, processing the user input and transitioning between states.
-        
-        Args:
-            user_input: Initial user input to start the conversation
-        """
-        if user_input:
-            self.conversation_history.append({"role": "user", "content": user_input})
-            self._log_json("Initial user input", {"role": "user", "content": user_input})
-            if self.dev_mode:
-                print(f"[DEV] Initial user input: {user_input}")
-        
-        loop_count = 0
-        
-        while True:
-            loop_count += 1
-            self._log_info(f"===== LOOP #{loop_count} =====")
-            
-            # Get current state configuration
-            state_config = self.config["states"].get(self.current_state)
-            if not state_config:
-                error_msg = f"Error: State '{self.current_state}' not found in configuration"
-                self._log_info(error_msg)
-                if self.dev_mode:
-                    print(f"[DEV] {error_msg}")
-                print(error_msg)
-                break
-            
-            self._log_info(f"Current state: {self.current_state}")
-            self._log_info(f"Allowed transitions: {state_config.get('transitions', [])}")
-            
-            if self.dev_mode:
-                print(f"[DEV] Current state: {self.current_state}")
-                print(f"[DEV] Allowed transitions: {state_config.get('transitions', [])}")
-            
-            # Call LLM with the state's prompt
-            prompt = state_config["prompt"]
-            temperature = state_config.get("temperature", 0.7)
-            model = state_config.get("model", "llama3-70b-8192")
-            
-            response = self._call_llm(prompt, temperature, model)
-            
-            # Extract response components
-            action = response.get("action", "")
-            message = response.get("message", "")
-            next_state = response.get("next_state", "")
-            require_input = response.get("require_input", "1")  # Default to requiring input if not specified
-            
-            self._log_info(f"LLM decided action: {action}")
-            self._log_info(f"LLM next state: {next_state}")
-            self._log_info(f"LLM require_input: {require_input}")
-            
-            if self.dev_mode:
-                print(f"[DEV] LLM decided action: {action}")
-                print(f"[DEV] LLM next state: {next_state}")
-                print(f"[DEV] LLM require_input: {require_input}")
-            
-            # Add assistant's message to conversation history
-            self.conversation_history.append({"role": "assistant", "content": message})
-            
-            # 记录助手的回复
-            self._log_json("Assistant reply", {"role": "assistant", "content": message})
-            
-            # Display the message to the user
-            print(f"Agent: {message}")            
-                
-            # Execute the action if it exists
-            if action and action in self.available_actions:
-                # Extract any action parameters from the response
-                action_params = response.get("action_params", {})
-                self._log_json(f"Executing action: {action}", action_params)
-                if self.dev_mode:
-                    print(f"[DEV] Executing action: {action}")
-                    print(f"[DEV] Action parameters: {action_params}")
-                
-                action_result = self.available_actions[action](action_params)
-                self._log_info(f"Action result: {action_result}")
-                
-                # Handle action results differently based on action type
-                if action_result:
-                    if action == "search":
-                        # Add search results to search history
-                        self.search_history.append(action_result)
-                        self._log_info(f"Search result added to search history")
-                        if self.dev_mode:
-                            print(f"[DEV] Search result added to search history")
-                    else:
-                        # For other actions, add to conversation history
-                        self.conversation_history.append({
-                            "role": "system", 
-                            "content": f"Action result: {action_result}"
-                        })
-                        self._log_json("Action result added to conversation", {
-                            "role": "system", 
-                            "content": f"Action result: {action_result}"
-                        })
-                    
-                    if self.dev_mode:
-                        print(f"[DEV] Action result: {action_result}")
-            
-            # Check if the next state is valid
-            allowed_transitions = state_config.get("transitions", [])
-            if next_state in self.config["states"] and (not allowed_transitions or next_state in allowed_transitions):
-                self._log_info(f"Transitioning from '{self.current_state}' to '{next_state}'")
-                if self.dev_mode:
-                    print(f"[DEV] Transitioning from '{self.current_state}' to '{next_state}'")
-                self.current_state = next_state
-            else:
-                error_msg = f"Error: Invalid transition from '{self.current_state}' to '{next_state}'"
-                self._log_info(error_msg)
-                if self.dev_mode:
-                    print(f"[DEV] {error_msg}")
-                print(error_msg)
-                self.current_state = "error"
-            
-            # Check if this is a terminal state
-            if next_state == "exit" or next_state == "":
-                self._log_info("Reached terminal state, exiting.")
-                if self.dev_mode:
-                    print("[DEV] Reached terminal state, exiting.")
-                break            
-
-            # Check if user input is required before next iteration
-            if require_input == "1":
-                # Get user input for the next iteration
-                user_input = input("You: ")
-                self.conversation_history.append({"role": "user", "content": user_input})
-                self._log_json("User input", {"role": "user", "content": user_input})
-                if self.dev_mode:
-                    print(f"[DEV] User input: {user_input}")
-            else:
-                self._log_info("No user input required, proceeding to next state automatically")
-                if self.dev_mode:
-                    print("[DEV] No user input required, proceeding to next state automatically")
-            
\ No newline at end of file
+import os
+import sys
+import copy
+import json
+import time
+import atexit
+import queue
+import random
+import asyncio
+import inspect
+import hashlib
+import logging
+import logging.handlers
+import datetime
+import functools
+from collections import deque
+from typing import Dict, Any, Callable, List
+
+# Choose the fastest available TOML parser; rtoml/pytomlpp parse around 5x
+# faster than tomllib but all three expose the same loads() surface here
+try:
+    import rtoml as _toml
+
+    def _parse_toml(data: bytes) -> Dict:
+        return _toml.loads(data.decode("utf-8"))
+except ImportError:
+    try:
+        import pytomlpp as _toml
+
+        def _parse_toml(data: bytes) -> Dict:
+            return _toml.loads(data.decode("utf-8"))
+    except ImportError:
+        try:
+            import tomllib  # Python 3.11+
+        except ImportError:
+            import tomli as tomllib  # Python 3.10 and below, requires 'pip install tomli'
+
+        def _parse_toml(data: bytes) -> Dict:
+            return tomllib.loads(data.decode("utf-8"))
+
+
+from _config_cache import load_config_cached
+
+
+@functools.lru_cache(maxsize=32)
+def _load_config_cached(config_path: str, mtime: float) -> Dict:
+    """Parse a TOML config, memoized on (absolute path, mtime).
+
+    Constructing many agents from the same file (test suites, multi-agent
+    servers) then pays for a single parse; a changed mtime naturally
+    misses. Below this in-memory layer sits the on-disk pickle cache, so
+    even a fresh process usually skips the TOML tokenizer.
+    """
+    return load_config_cached(config_path, _parse_toml)
+
+# Prefer orjson when available: it parses LLM responses and serializes log
+# records several times faster than the stdlib; fall back transparently
+try:
+    import orjson
+
+    def _json_loads(text):
+        return orjson.loads(text)
+
+    def _json_dumps(data, indent: bool = False) -> str:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, option=option).decode("utf-8")
+except ImportError:
+    def _json_loads(text):
+        return json.loads(text)
+
+    def _json_dumps(data, indent: bool = False) -> str:
+        return json.dumps(data, ensure_ascii=False, indent=2 if indent else None)
+
+import httpx
+from openai import AsyncOpenAI, APIConnectionError, APITimeoutError, RateLimitError
+
+# Retry policy for transient API failures (rate limits, dropped connections)
+MAX_RETRY_ATTEMPTS = 5
+MAX_RETRY_BACKOFF = 60  # seconds
+
+# One AsyncOpenAI client (and its httpx connection pool) per API key, shared
+# by every agent using that key
+_SHARED_CLIENTS: Dict[str, AsyncOpenAI] = {}
+
+
+class _CachedTimestampFormatter(logging.Formatter):
+    """Log formatter that reuses the rendered timestamp within the same second.
+
+    strftime is surprisingly expensive and consecutive records almost always
+    share a second, so the formatted string is only recomputed when the
+    integer second actually changes.
+    """
+
+    def __init__(self, fmt=None, datefmt=None):
+        super().__init__(fmt, datefmt)
+        self._last_second = None
+        self._last_rendered = ""
+
+    def formatTime(self, record, datefmt=None):
+        second = int(record.created)
+        if second != self._last_second:
+            self._last_rendered = time.strftime(
+                datefmt or "%Y-%m-%d %H:%M:%S", time.localtime(second)
+            )
+            self._last_second = second
+        return self._last_rendered
+
+
+class AIAgent:
+    def __init__(self, config_path: str, api_key: str = None, dev_mode: bool = False,
+                 log_level: int = logging.INFO):
+        """
+        Initialize the AI agent with a configuration file.
+
+        Args:
+            config_path: Path to the TOML configuration file
+            api_key: OpenRouter API key (defaults to OPENAI_API_KEY environment variable)
+            dev_mode: When True, prints detailed debugging information
+            log_level: Logging threshold; pass e.g. logging.WARNING to skip
+                       per-turn log formatting entirely
+        """
+        self.api_key = api_key or os.environ.get("OPENAI_API_KEY")
+        if not self.api_key:
+            raise ValueError("OpenRouter API key is required. Provide it as a parameter or set OPENAI_API_KEY environment variable.")
+        
+        # Initialize dev mode flag
+        self.dev_mode = dev_mode
+        
+        # Reuse the shared async OpenAI client for this API key
+        self.client = type(self).get_client(self.api_key)
+
+        # Load configuration
+        self.config = self._load_config(config_path)
+        
+        # Precompute the invariant part of the system prompt once. Keeping it
+        # byte-identical across calls lets provider-side prefix caches hit on
+        # every call after the first.
+        description = self.config.get("description", {})
+        self._stable_prefix = "\n\n".join([
+            description.get("role", ""),
+            description.get("state_machine_logic", ""),
+            description.get("work_principles", ""),
+        ])
+        self._prompt_cache_key = hashlib.sha256(self._stable_prefix.encode("utf-8")).hexdigest()
+
+        # States are looked up every loop iteration; bind the table once and
+        # precompute frozensets so transition validation is O(1) per turn
+        self._states = self.config.get("states", {})
+        self._state_keys = frozenset(self._states)
+        self._transitions = {
+            state: frozenset(cfg.get("transitions", []))
+            for state, cfg in self._states.items()
+        }
+
+        # History windows: everything kept here is resent as input tokens on
+        # every LLM call, so bound both histories to keep cost and prefill
+        # latency flat regardless of session length
+        self.max_history_turns = self.config.get("max_history_turns", 20)
+        self.max_search_results = self.config.get("max_search_results", 5)
+
+        # Current state and conversation history
+        self.current_state = self.config.get("initial_state", "start")
+
+        # The messages list sent to the LLM is owned by the agent and mutated
+        # in place: slots 0 and 1 are reserved for the stable and volatile
+        # system messages, conversation turns are appended after them. This
+        # avoids re-copying the whole history on every call.
+        self._messages = [None, None]
+
+        # Separate search history; the deque evicts the oldest result in O(1)
+        # on append once the window is full
+        self.search_history = deque(maxlen=self.max_search_results)
+
+        # Response cache keyed on (state, recent history, prompt, model); only
+        # consulted for near-deterministic calls (low temperature)
+        self._response_cache = {}
+        
+        # Register available actions
+        self.available_actions = {}
+        
+        # 初始化日志文件
+        self.log_timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H%M%S")
+        self.log_file = f"agent_log_{self.log_timestamp}.txt"
+
+        # Route log records through a queue to a background listener thread so
+        # disk I/O never runs on the agent's hot path; the main loop only pays
+        # for a queue put per record
+        log_queue = queue.Queue(-1)
+        file_handler = logging.handlers.RotatingFileHandler(
+            self.log_file, maxBytes=16 * 1024 * 1024, encoding="utf-8"
+        )
+        file_handler.setFormatter(_CachedTimestampFormatter("[%(asctime)s] %(message)s", datefmt="%Y-%m-%d %H:%M:%S"))
+        self.logger = logging.getLogger(f"agent.{id(self)}")
+        self.logger.setLevel(log_level)
+        self.logger.propagate = False
+        self.logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        # Dev mode echoes the very same records to stdout from the listener,
+        # so each event is formatted once instead of once per sink
+        log_handlers = [file_handler]
+        if dev_mode:
+            dev_handler = logging.StreamHandler(sys.stdout)
+            dev_handler.setFormatter(logging.Formatter("[DEV] %(message)s"))
+            log_handlers.append(dev_handler)
+        self._log_listener = logging.handlers.QueueListener(log_queue, *log_handlers)
+        self._log_listener.start()
+        atexit.register(self.close)
+
+        # Cache the level check so hot paths can skip json.dumps and f-string
+        # construction entirely when INFO records would be dropped anyway
+        self._log_enabled = self.logger.isEnabledFor(logging.INFO)
+
+        # 记录初始化信息
+        self._log_info(f"Agent initialized with config from {config_path}")
+        self._log_info(f"Initial state: {self.current_state}")
+        self._log_info(f"Dev mode: {self.dev_mode}")
+        
+        if self.dev_mode:
+            print(f"[DEV] Logging to file: {self.log_file}")
+    
+    @classmethod
+    def get_client(cls, api_key: str) -> AsyncOpenAI:
+        """Return the shared AsyncOpenAI client for the given API key.
+
+        Every agent constructed with the same key reuses one httpx connection
+        pool, so new agents skip the TCP+TLS handshake and concurrent calls
+        parallelize up to the pool limit. Caveat: the shared client binds to
+        the event loop it is first used on (openai-python #820/#1059), so
+        agents sharing a client must run in the same loop.
+        """
+        client = _SHARED_CLIENTS.get(api_key)
+        if client is None:
+            client = AsyncOpenAI(
+                base_url="https://openrouter.ai/api/v1",
+                api_key=api_key,
+                http_client=httpx.AsyncClient(
+                    limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+                    timeout=60,
+                ),
+            )
+            _SHARED_CLIENTS[api_key] = client
+        return client
+
+    @property
+    def conversation_history(self):
+        """Conversation turns, as a view over the agent-owned messages list."""
+        return self._messages[2:]
+
+    def close(self):
+        """Stop the background log listener, flushing any queued records."""
+        if self._log_listener is not None:
+            self._log_listener.stop()
+            self._log_listener = None
+
+    def _log_info(self, message: str):
+        """写入信息到日志文件"""
+        if not self._log_enabled:
+            return
+        self.logger.info(message)
+
+    def _log_json(self, title: str, data: Any):
+        """将JSON数据格式化并写入日志文件"""
+        if not self._log_enabled:
+            return
+        body = None
+        if isinstance(data, (dict, list)):
+            try:
+                body = _json_dumps(data, indent=True)
+            except:
+                body = f"无法序列化为JSON: {str(data)}"
+        if body is None:
+            body = str(data)
+        # One record per JSON dump; 12 是 "===== " 和 " =====" 的长度
+        self.logger.info("===== %s =====\n%s\n%s", title, body, "=" * (len(title) + 12))
+    
+    def _load_config(self, config_path: str) -> Dict:
+        """Load and parse the TOML configuration file."""
+        path = os.path.abspath(config_path)
+        cached = _load_config_cached(path, os.path.getmtime(path))
+        # Each agent gets its own copy so cached configs are never mutated
+        return copy.deepcopy(cached)
+    
+    def register_action(self, action_name: str, action_func: Callable):
+        """Register an external function that the agent can call."""
+        self.available_actions[action_name] = action_func
+        self._log_info(f"Registered action: {action_name}")
+
+    def register_actions(self, actions: Dict[str, Callable]):
+        """Register several actions at once with a single dict update."""
+        self.available_actions.update(actions)
+        self._log_info(f"Registered actions: {', '.join(actions)}")
+    
+    def _trim_history(self):
+        """Drop conversation turns that fall outside the configured sliding window.
+
+        The search history needs no trimming: its deque evicts on append.
+        """
+        max_messages = 2 * self.max_history_turns
+        excess = len(self._messages) - 2 - max_messages
+        if excess > 0:
+            del self._messages[2:2 + excess]
+            self._log_info(f"Conversation history trimmed to last {max_messages} messages")
+
+    def _cache_key(self, prompt: str, model: str) -> str:
+        """Build a cache key from everything that shapes the LLM call.
+
+        The search history is part of the volatile system prompt, so it
+        must be part of the key too: a new search result has to miss the
+        cache rather than replay the pre-search response.
+        """
+        payload = _json_dumps({
+            "state": self.current_state,
+            "hist": self._messages[max(2, len(self._messages) - 4):],
+            "search": list(self.search_history),
+            "prompt": prompt,
+            "model": model
+        })
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def invalidate_cache(self):
+        """Clear the response cache, e.g. after reloading the configuration."""
+        self._response_cache.clear()
+        self._log_info("Response cache invalidated")
+
+    async def _call_llm(self, prompt: str, temperature: float, model: str) -> Dict:
+        """Call the LLM API and return the response as a parsed JSON."""
+        # Low-temperature calls are near-deterministic, so a repeated
+        # state+history+prompt combination can reuse the previous response
+        # instead of paying for another network round-trip.
+        cacheable = temperature < 0.2
+        cache_key = self._cache_key(prompt, model) if cacheable else None
+        if cacheable and cache_key in self._response_cache:
+            self._log_info(f"Response cache hit for state '{self.current_state}'")
+            return dict(self._response_cache[cache_key])
+
+        try:
+            # Format search history as a separate block if it exists; a single
+            # join is linear in the history size, unlike repeated concatenation
+            search_history_block = ""
+            if self.search_history:
+                search_history_block = "\n\nSEARCH HISTORY:\n" + "\n\n".join(
+                    f"Search #{i+1}: {result}" for i, result in enumerate(self.search_history)
+                ) + "\n\n"
+
+            # Volatile per-call context goes into a second system message so the
+            # stable prefix above it stays byte-identical between calls.
+            volatile_system_prompt = f"""CURRENT STATE: {self.current_state}
+{search_history_block}
+{prompt}
+"""
+
+            # The stable prefix is marked as cacheable (honored by providers
+            # that support explicit prompt caching, e.g. Anthropic via
+            # OpenRouter). Only the two system slots are rewritten; the
+            # conversation turns after them are already in place.
+            self._messages[0] = {
+                "role": "system",
+                "content": [
+                    {
+                        "type": "text",
+                        "text": self._stable_prefix,
+                        "cache_control": {"type": "ephemeral"},
+                    }
+                ],
+            }
+            self._messages[1] = {"role": "system", "content": volatile_system_prompt}
+            messages = self._messages
+
+            # 记录LLM调用的详细信息
+            self._log_info(f"CALLING LLM - Model: {model}, Temperature: {temperature}")
+            self._log_info(f"Current state: {self.current_state}")
+            self._log_json("System prompt (stable prefix)", {"role": "system", "content": self._stable_prefix})
+            self._log_json("System prompt (volatile)", {"role": "system", "content": volatile_system_prompt})
+            
+            if self._log_enabled:
+                for i, msg in enumerate(messages):
+                    if i > 1:  # 跳过系统提示，因为已经单独记录了
+                        self._log_json(f"Message {i} ({msg['role']})", msg)
+
+            # Transient failures are retried with randomized exponential
+            # backoff instead of being swallowed as synthetic error responses;
+            # a rate-limited call resumes after seconds rather than failing
+            # the whole turn
+            for attempt in range(MAX_RETRY_ATTEMPTS):
+                try:
+                    # Stream the response so tokens are consumed as they
+                    # arrive instead of waiting for the full generation
+                    stream = await self.client.chat.completions.create(
+                        model=model,
+                        temperature=temperature,
+                        messages=messages,
+                        max_tokens=5000,
+                        response_format={"type": "json_object"},
+                        stream=True,
+                        # Pin the stable prefix on OpenAI-compatible backends
+                        # that route prompt-cache lookups by key
+                        extra_body={"prompt_cache_key": self._prompt_cache_key}
+                    )
+
+                    response_chunks = []
+                    if self.dev_mode:
+                        print("\n" + "="*80)
+                        print("[DEV] LLM STREAMING RESPONSE:")
+                    async for chunk in stream:
+                        if not chunk.choices:
+                            continue
+                        delta = chunk.choices[0].delta.content
+                        if delta:
+                            response_chunks.append(delta)
+                            if self.dev_mode:
+                                print(delta, end="", flush=True)
+                    if self.dev_mode:
+                        print("\n" + "="*80 + "\n")
+                    break
+                except (RateLimitError, APIConnectionError, APITimeoutError) as e:
+                    if attempt + 1 >= MAX_RETRY_ATTEMPTS:
+                        raise
+                    delay = random.uniform(0, min(MAX_RETRY_BACKOFF, 2 ** attempt))
+                    # Honor the server's Retry-After hint when rate limited
+                    if isinstance(e, RateLimitError) and e.response is not None:
+                        retry_after = e.response.headers.get("Retry-After")
+                        if retry_after:
+                            try:
+                                delay = min(max(delay, float(retry_after)), MAX_RETRY_BACKOFF)
+                            except ValueError:
+                                pass
+                    self._log_info(
+                        f"Transient API error ({type(e).__name__}), retrying in {delay:.1f}s "
+                        f"(attempt {attempt + 1}/{MAX_RETRY_ATTEMPTS})"
+                    )
+                    await asyncio.sleep(delay)
+
+            # The response is a single JSON object, so parsing waits for the
+            # stream to finish; join the accumulated deltas once
+            response_text = "".join(response_chunks)
+
+            # 记录LLM返回的原始响应
+            self._log_json("LLM RAW RESPONSE", response_text)
+
+            try:
+                parsed_response = _json_loads(response_text)
+                if cacheable:
+                    self._response_cache[cache_key] = dict(parsed_response)
+                return parsed_response
+            except json.JSONDecodeError:
+                error_msg = f"Error: LLM response is not valid JSON: {response_text}"
+                self._log_info(error_msg)
+                return {
+                    "action": "error",
+                    "message": "I apologize, but I encountered an error processing your request.",
+                    "next_state": "error",
+                    "require_input": "1"  # Default to requiring input after an error
+                }
+        except Exception as e:
+            error_msg = f"Error calling LLM API: {e}"
+            self._log_info(error_msg)
+            return {
+                "action": "error",
+                "message": f"Error occurred: {str(e)}",
+                "next_state": "error",
+                "require_input": "1"  # Default to requiring input after an error
+            }
+    
+    async def run(self, user_input: str = None):
+        """
+        Run the agent's main loop, processing the user input and transitioning between states.
+
+        Args:
+            user_input: Initial user input to start the conversation
+        """
+        if user_input:
+            self._messages.append({"role": "user", "content": user_input})
+            self._log_json("Initial user input", {"role": "user", "content": user_input})
+        
+        loop_count = 0
+        
+        while True:
+            loop_count += 1
+            self._log_info(f"===== LOOP #{loop_count} =====")
+            
+            # Get current state configuration
+            state_config = self._states.get(self.current_state)
+            if not state_config:
+                error_msg = f"Error: State '{self.current_state}' not found in configuration"
+                self._log_info(error_msg)
+                print(error_msg)
+                break
+            
+            self._log_info(f"Current state: {self.current_state}")
+            self._log_info(f"Allowed transitions: {state_config.get('transitions', [])}")
+            
+            # Call LLM with the state's prompt
+            prompt = state_config["prompt"]
+            temperature = state_config.get("temperature", 0.7)
+            model = state_config.get("model", "llama3-70b-8192")
+            
+            # Keep the histories bounded before they are sent to the LLM
+            self._trim_history()
+
+            response = await self._call_llm(prompt, temperature, model)
+            
+            # Extract response components
+            action = response.get("action", "")
+            message = response.get("message", "")
+            next_state = response.get("next_state", "")
+            require_input = response.get("require_input", "1")  # Default to requiring input if not specified
+            
+            self._log_info(f"LLM decided action: {action}")
+            self._log_info(f"LLM next state: {next_state}")
+            self._log_info(f"LLM require_input: {require_input}")
+            
+            # Add assistant's message to conversation history
+            self._messages.append({"role": "assistant", "content": message})
+            
+            # 记录助手的回复
+            self._log_json("Assistant reply", {"role": "assistant", "content": message})
+            
+            # Display the message to the user
+            print(f"Agent: {message}")            
+                
+            # Execute the action if it exists
+            if action and action in self.available_actions:
+                # Extract any action parameters from the response
+                action_params = response.get("action_params", {})
+                self._log_json(f"Executing action: {action}", action_params)
+
+                action_result = self.available_actions[action](action_params)
+                # Actions may be plain functions or coroutines; awaiting
+                # the latter keeps their I/O on this event loop
+                if inspect.isawaitable(action_result):
+                    action_result = await action_result
+                self._log_info(f"Action result: {action_result}")
+                
+                # Handle action results differently based on action type
+                if action_result:
+                    if action == "search":
+                        # Add search results to search history
+                        self.search_history.append(action_result)
+                        self._log_info(f"Search result added to search history")
+                    else:
+                        # For other actions, add to conversation history
+                        self._messages.append({
+                            "role": "system", 
+                            "content": f"Action result: {action_result}"
+                        })
+                        self._log_json("Action result added to conversation", {
+                            "role": "system", 
+                            "content": f"Action result: {action_result}"
+                        })
+
+            
+            # Check if the next state is valid
+            allowed_transitions = self._transitions[self.current_state]
+            if next_state in self._state_keys and (not allowed_transitions or next_state in allowed_transitions):
+                self._log_info(f"Transitioning from '{self.current_state}' to '{next_state}'")
+                self.current_state = next_state
+            else:
+                error_msg = f"Error: Invalid transition from '{self.current_state}' to '{next_state}'"
+                self._log_info(error_msg)
+                print(error_msg)
+                self.current_state = "error"
+            
+            # Check if this is a terminal state
+            if next_state == "exit" or next_state == "":
+                self._log_info("Reached terminal state, exiting.")
+                break            
+
+            # Check if user input is required before next iteration
+            if require_input == "1":
+                # Get user input for the next iteration without blocking the event loop
+                user_input = await asyncio.to_thread(input, "You: ")
+                self._messages.append({"role": "user", "content": user_input})
+                self._log_json("User input", {"role": "user", "content": user_input})
+            else:
+                self._log_info("No user input required, proceeding to next state automatically")
+
+    @staticmethod
+    async def run_many(agents: List["AIAgent"], inputs: List[str]):
+        """
+        Run several agents concurrently, pairing each agent with its initial input.
+
+        Because each agent's LLM calls are async, the network wait of one agent
+        overlaps with the others instead of serializing on round-trip latency.
+
+        Args:
+            agents: List of AIAgent instances to run
+            inputs: List of initial user inputs, one per agent
+        """
+        await asyncio.gather(*(agent.run(user_input) for agent, user_input in zip(agents, inputs)))
@@ -1,690 +1,1154 @@
-import os
-import sys
-import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import networkx as nx
-
-# Choose the appropriate TOML library based on Python version
-try:
-    import tomllib  # Python 3.11+
-    import tomli_w as tomli_write  # For writing TOML
-except ImportError:
-    import tomli as tomllib  # Python 3.10 and below
-    import tomli_w as tomli_write  # For writing TOML
-
-class ConfigEditorApp:
-    def __init__(self, root, config_path):
-        self.root = root
-        self.root.title("Agent Config Editor")
-        self.root.geometry("1200x800")
-        self.config_path = config_path
-        self.config_data = None
-        
-        # Create main frame with notebook for tabs
-        self.notebook = ttk.Notebook(root)
-        self.notebook.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-        
-        # Create editor tab
-        self.editor_frame = ttk.Frame(self.notebook)
-        self.notebook.add(self.editor_frame, text="Editor")
-        
-        # Create visualization tab
-        self.graph_frame = ttk.Frame(self.notebook)
-        self.notebook.add(self.graph_frame, text="State Visualization")
-        
-        # Setup the editor interface
-        self.setup_editor_interface()
-        
-        # Setup the graph visualization interface
-        self.setup_graph_interface()
-        
-        # Load initial configuration
-        self.load_config()
-        
-    def setup_editor_interface(self):
-        # Create main frame
-        self.main_frame = ttk.Frame(self.editor_frame)
-        self.main_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        
-        # Create left panel for navigation
-        self.left_panel = ttk.Frame(self.main_frame, width=300)
-        self.left_panel.pack(side=tk.LEFT, fill=tk.Y, padx=(0, 10))
-        
-        # Create right panel for editing
-        self.right_panel = ttk.Frame(self.main_frame)
-        self.right_panel.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
-        
-        # Create treeview for navigation
-        self.tree = ttk.Treeview(self.left_panel)
-        self.tree.pack(fill=tk.BOTH, expand=True)
-        self.tree.bind("<<TreeviewSelect>>", self.on_tree_select)
-        
-        # Create frame for buttons
-        self.btn_frame = ttk.Frame(self.left_panel)
-        self.btn_frame.pack(fill=tk.X, pady=10)
-        
-        # Create buttons
-        self.save_btn = ttk.Button(self.btn_frame, text="Save", command=self.save_config)
-        self.save_btn.pack(side=tk.LEFT, padx=5)
-        
-        self.reload_btn = ttk.Button(self.btn_frame, text="Reload", command=self.load_config)
-        self.reload_btn.pack(side=tk.LEFT, padx=5)
-        
-        self.add_state_btn = ttk.Button(self.btn_frame, text="Add State", command=self.add_state)
-        self.add_state_btn.pack(side=tk.LEFT, padx=5)
-    
-    def setup_graph_interface(self):
-        # Create controls frame at the top
-        self.graph_controls = ttk.Frame(self.graph_frame)
-        self.graph_controls.pack(fill=tk.X, padx=10, pady=10)
-        
-        # Add refresh button
-        self.refresh_graph_btn = ttk.Button(self.graph_controls, text="Refresh Graph", command=self.update_graph)
-        self.refresh_graph_btn.pack(side=tk.LEFT, padx=5)
-        
-        # Add layout options
-        ttk.Label(self.graph_controls, text="Layout:").pack(side=tk.LEFT, padx=(20, 5))
-        self.layout_var = tk.StringVar(value="spring")
-        layouts = ["spring", "circular", "kamada_kawai", "planar", "random", "shell", "spectral"]
-        self.layout_combo = ttk.Combobox(self.graph_controls, textvariable=self.layout_var, values=layouts)
-        self.layout_combo.pack(side=tk.LEFT, padx=5)
-        self.layout_combo.bind("<<ComboboxSelected>>", lambda e: self.update_graph())
-        
-        # Create frame for the graph
-        self.graph_container = ttk.Frame(self.graph_frame)
-        self.graph_container.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        
-        # Canvas for the graph will be created when needed
-        self.canvas = None
-        
-    def load_config(self):
-        try:
-            with open(self.config_path, "rb") as f:
-                self.config_data = tomllib.load(f)
-            self.populate_tree()
-            self.update_graph()
-            messagebox.showinfo("Success", "Configuration loaded successfully")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load configuration: {str(e)}")
-    
-    def populate_tree(self):
-        # Clear existing tree
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        # Add root items
-        root_id = self.tree.insert("", "end", text="Configuration Root", values=["root"])
-        
-        # Add basic configuration
-        if "initial_state" in self.config_data:
-            self.tree.insert(root_id, "end", text=f"Initial State: {self.config_data['initial_state']}", 
-                            values=["initial_state"])
-        
-        # Add description
-        if "description" in self.config_data:
-            desc_id = self.tree.insert(root_id, "end", text="Description", values=["description"])
-            for key in self.config_data["description"]:
-                self.tree.insert(desc_id, "end", text=key, values=["description", key])
-        
-        # Add states
-        if "states" in self.config_data:
-            states_id = self.tree.insert(root_id, "end", text="States", values=["states"])
-            for state_name in self.config_data["states"]:
-                state_id = self.tree.insert(states_id, "end", text=state_name, values=["states", state_name])
-                for key in self.config_data["states"][state_name]:
-                    self.tree.insert(state_id, "end", text=key, values=["states", state_name, key])
-        
-        # Expand all
-        self.tree.item(root_id, open=True)
-    
-    def update_graph(self):
-        if not self.config_data or 'states' not in self.config_data:
-            return
-        
-        # Clear the existing graph container
-        for widget in self.graph_container.winfo_children():
-            widget.destroy()
-        
-        # Create a new figure
-        fig, ax = plt.subplots(figsize=(10, 8))
-        
-        # Create a directed graph
-        G = nx.DiGraph()
-        
-        # Add nodes (states)
-        for state_name in self.config_data['states']:
-            # Add color highlight for initial state
-            if self.config_data.get('initial_state') == state_name:
-                G.add_node(state_name, initial=True)
-            else:
-                G.add_node(state_name, initial=False)
-        
-        # Add edges (transitions)
-        for state_name, state_data in self.config_data['states'].items():
-            if 'transitions' in state_data:
-                for target in state_data['transitions']:
-                    if target in self.config_data['states']:
-                        G.add_edge(state_name, target)
-        
-        # Get the layout algorithm
-        layout_name = self.layout_var.get()
-        if layout_name == "spring":
-            pos = nx.spring_layout(G, seed=42)
-        elif layout_name == "circular":
-            pos = nx.circular_layout(G)
-        elif layout_name == "kamada_kawai":
-            pos = nx.kamada_kawai_layout(G)
-        elif layout_name == "planar":
-            try:
-                pos = nx.planar_layout(G)
-            except:
-                pos = nx.spring_layout(G, seed=42)  # Fallback if graph is not planar
-        elif layout_name == "random":
-            pos = nx.random_layout(G, seed=42)
-        elif layout_name == "shell":
-            pos = nx.shell_layout(G)
-        elif layout_name == "spectral":
-            pos = nx.spectral_layout(G)
-        else:
-            pos = nx.spring_layout(G, seed=42)
-        
-        # Create node lists by type for coloring
-        initial_nodes = [n for n, attr in G.nodes(data=True) if attr.get('initial', False)]
-        regular_nodes = [n for n, attr in G.nodes(data=True) if not attr.get('initial', False)]
-        
-        # Draw the nodes
-        nx.draw_networkx_nodes(G, pos, nodelist=initial_nodes, node_color='lightgreen', node_size=700, ax=ax)
-        nx.draw_networkx_nodes(G, pos, nodelist=regular_nodes, node_color='skyblue', node_size=500, ax=ax)
-        
-        # Draw the edges
-        nx.draw_networkx_edges(G, pos, width=1.0, alpha=0.7, arrowsize=20, ax=ax)
-        
-        # Draw the labels
-        nx.draw_networkx_labels(G, pos, font_size=10, font_family='sans-serif', ax=ax)
-        
-        # Remove the axis
-        ax.set_axis_off()
-        
-        # Add title
-        plt.title("State Machine Visualization", fontsize=16)
-        
-        # Add legend
-        import matplotlib.patches as mpatches
-        initial_patch = mpatches.Patch(color='lightgreen', label='Initial State')
-        regular_patch = mpatches.Patch(color='skyblue', label='Regular State')
-        plt.legend(handles=[initial_patch, regular_patch], loc='upper right')
-        
-        # Create canvas
-        canvas = FigureCanvasTkAgg(fig, master=self.graph_container)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-        
-        # Store reference to canvas
-        self.canvas = canvas
-    
-    def on_tree_select(self, event):
-        # Clear right panel
-        for widget in self.right_panel.winfo_children():
-            widget.destroy()
-        
-        # Get selected item
-        selected_item = self.tree.selection()[0]
-        values = self.tree.item(selected_item, "values")
-        
-        if not values:
-            return
-        
-        # Show appropriate editor based on selection
-        if values[0] == "root":
-            self.show_root_editor()
-        elif values[0] == "initial_state":
-            self.show_initial_state_editor()
-        elif values[0] == "description":
-            if len(values) > 1:
-                self.show_description_field_editor(values[1])
-            else:
-                self.show_description_editor()
-        elif values[0] == "states":
-            if len(values) == 1:
-                self.show_states_editor()
-            elif len(values) == 2:
-                self.show_state_editor(values[1])
-            elif len(values) == 3:
-                self.show_state_field_editor(values[1], values[2])
-    
-    def show_root_editor(self):
-        frame = ttk.LabelFrame(self.right_panel, text="Configuration Overview")
-        frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        
-        # Show configuration summary
-        info_text = f"""
-        Configuration File: {self.config_path}
-        Initial State: {self.config_data.get('initial_state', 'Not set')}
-        Number of States: {len(self.config_data.get('states', {}))}
-        
-        States:
-        {', '.join(list(self.config_data.get('states', {}).keys()))}
-        """
-        
-        info_label = ttk.Label(frame, text=info_text, justify=tk.LEFT, padding=10)
-        info_label.pack(fill=tk.BOTH, expand=True)
-    
-    def show_initial_state_editor(self):
-        frame = ttk.LabelFrame(self.right_panel, text="Initial State")
-        frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        
-        # Create dropdown for initial state
-        state_label = ttk.Label(frame, text="Initial State:")
-        state_label.pack(pady=(10, 5))
-        
-        state_var = tk.StringVar(value=self.config_data.get('initial_state', ''))
-        state_dropdown = ttk.Combobox(frame, textvariable=state_var)
-        state_dropdown['values'] = list(self.config_data.get('states', {}).keys())
-        state_dropdown.pack(pady=(0, 10))
-        
-        # Save button
-        save_btn = ttk.Button(frame, text="Update", 
-                             command=lambda: self.update_initial_state(state_var.get()))
-        save_btn.pack(pady=10)
-    
-    def update_initial_state(self, new_state):
-        if not new_state or new_state not in self.config_data.get('states', {}):
-            messagebox.showerror("Error", f"Invalid state: {new_state}")
-            return
-        
-        self.config_data['initial_state'] = new_state
-        self.populate_tree()
-        self.update_graph()  # Update the graph to show new initial state
-        messagebox.showinfo("Success", f"Initial state updated to {new_state}")
-    
-    def show_description_editor(self):
-        frame = ttk.LabelFrame(self.right_panel, text="Description")
-        frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        
-        # Create a scrolled text widget for each description field
-        for key in self.config_data.get('description', {}):
-            field_frame = ttk.LabelFrame(frame, text=key)
-            field_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-            
-            text_widget = scrolledtext.ScrolledText(field_frame, wrap=tk.WORD, height=10)
-            text_widget.insert(tk.END, self.config_data['description'][key])
-            text_widget.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-            
-            update_btn = ttk.Button(field_frame, text="Update", 
-                                   command=lambda k=key, t=text_widget: self.update_description_field(k, t.get("1.0", tk.END)))
-            update_btn.pack(pady=5)
-    
-    def show_description_field_editor(self, field):
-        frame = ttk.LabelFrame(self.right_panel, text=f"Description - {field}")
-        frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        
-        # Create a scrolled text widget for the description field
-        text_widget = scrolledtext.ScrolledText(frame, wrap=tk.WORD)
-        text_widget.insert(tk.END, self.config_data['description'].get(field, ''))
-        text_widget.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        
-        # Save button
-        save_btn = ttk.Button(frame, text="Update", 
-                             command=lambda: self.update_description_field(field, text_widget.get("1.0", tk.END)))
-        save_btn.pack(pady=10)
-    
-    def update_description_field(self, field, new_text):
-        if 'description' not in self.config_data:
-            self.config_data['description'] = {}
-        
-        self.config_data['description'][field] = new_text.strip()
-        messagebox.showinfo("Success", f"Description field '{field}' updated")
-    
-    def show_states_editor(self):
-        frame = ttk.LabelFrame(self.right_panel, text="States")
-        frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        
-        # Create a listbox of states
-        listbox_frame = ttk.Frame(frame)
-        listbox_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        
-        states_list = list(self.config_data.get('states', {}).keys())
-        listbox = tk.Listbox(listbox_frame)
-        for state in states_list:
-            listbox.insert(tk.END, state)
-        
-        scrollbar = ttk.Scrollbar(listbox_frame, orient=tk.VERTICAL, command=listbox.yview)
-        listbox.configure(yscrollcommand=scrollbar.set)
-        
-        listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        
-        # Buttons for state management
-        btn_frame = ttk.Frame(frame)
-        btn_frame.pack(fill=tk.X, padx=10, pady=10)
-        
-        add_btn = ttk.Button(btn_frame, text="Add State", command=self.add_state)
-        add_btn.pack(side=tk.LEFT, padx=5)
-        
-        del_btn = ttk.Button(btn_frame, text="Delete State", 
-                            command=lambda: self.delete_state(listbox.get(listbox.curselection()) if listbox.curselection() else None))
-        del_btn.pack(side=tk.LEFT, padx=5)
-        
-        edit_btn = ttk.Button(btn_frame, text="Edit State", 
-                             command=lambda: self.edit_state(listbox.get(listbox.curselection()) if listbox.curselection() else None))
-        edit_btn.pack(side=tk.LEFT, padx=5)
-    
-    def show_state_editor(self, state_name):
-        frame = ttk.LabelFrame(self.right_panel, text=f"State: {state_name}")
-        frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        
-        # Create notebook for tabs
-        notebook = ttk.Notebook(frame)
-        notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        
-        # Create tabs for each field
-        state_data = self.config_data['states'][state_name]
-        
-        # Prompt tab
-        prompt_tab = ttk.Frame(notebook)
-        notebook.add(prompt_tab, text="Prompt")
-        
-        prompt_text = scrolledtext.ScrolledText(prompt_tab, wrap=tk.WORD)
-        prompt_text.insert(tk.END, state_data.get('prompt', ''))
-        prompt_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        
-        prompt_btn = ttk.Button(prompt_tab, text="Update Prompt", 
-                               command=lambda: self.update_state_field(state_name, 'prompt', prompt_text.get("1.0", tk.END)))
-        prompt_btn.pack(pady=10)
-        
-        # Temperature tab
-        temp_tab = ttk.Frame(notebook)
-        notebook.add(temp_tab, text="Temperature")
-        
-        temp_label = ttk.Label(temp_tab, text="Temperature (0.0 - 1.0):")
-        temp_label.pack(pady=(10, 5))
-        
-        temp_var = tk.DoubleVar(value=state_data.get('temperature', 0.7))
-        temp_slider = ttk.Scale(temp_tab, from_=0.0, to=1.0, variable=temp_var, orient=tk.HORIZONTAL)
-        temp_slider.pack(fill=tk.X, padx=20, pady=5)
-        
-        temp_value = ttk.Label(temp_tab, textvariable=temp_var)
-        temp_value.pack(pady=5)
-        
-        temp_btn = ttk.Button(temp_tab, text="Update Temperature", 
-                             command=lambda: self.update_state_field(state_name, 'temperature', temp_var.get()))
-        temp_btn.pack(pady=10)
-        
-        # Model tab
-        model_tab = ttk.Frame(notebook)
-        notebook.add(model_tab, text="Model")
-        
-        model_label = ttk.Label(model_tab, text="Model:")
-        model_label.pack(pady=(10, 5))
-        
-        model_var = tk.StringVar(value=state_data.get('model', ''))
-        model_entry = ttk.Entry(model_tab, textvariable=model_var, width=40)
-        model_entry.pack(pady=5)
-        
-        model_options = ["llama3-70b-8192", "qwen/qwen-2.5-72b-instruct", "gpt-4o", "claude-3-opus-20240229"]
-        model_dropdown = ttk.Combobox(model_tab, textvariable=model_var, values=model_options)
-        model_dropdown.pack(pady=5)
-        
-        model_btn = ttk.Button(model_tab, text="Update Model", 
-                              command=lambda: self.update_state_field(state_name, 'model', model_var.get()))
-        model_btn.pack(pady=10)
-        
-        # Transitions tab
-        trans_tab = ttk.Frame(notebook)
-        notebook.add(trans_tab, text="Transitions")
-        
-        trans_label = ttk.Label(trans_tab, text="Allowed Transitions (comma-separated):")
-        trans_label.pack(pady=(10, 5))
-        
-        trans_var = tk.StringVar(value=", ".join(state_data.get('transitions', [])))
-        trans_entry = ttk.Entry(trans_tab, textvariable=trans_var, width=40)
-        trans_entry.pack(pady=5)
-        
-        # Add all states as checkbuttons
-        trans_frame = ttk.Frame(trans_tab)
-        trans_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        
-        trans_vars = {}
-        all_states = list(self.config_data['states'].keys())
-        current_transitions = state_data.get('transitions', [])
-        
-        for i, state in enumerate(all_states):
-            var = tk.BooleanVar(value=state in current_transitions)
-            trans_vars[state] = var
-            check = ttk.Checkbutton(trans_frame, text=state, variable=var)
-            check.grid(row=i//2, column=i%2, sticky=tk.W, padx=10, pady=5)
-        
-        trans_btn = ttk.Button(trans_tab, text="Update Transitions", 
-                              command=lambda: self.update_transitions(state_name, trans_vars))
-        trans_btn.pack(pady=10)
-    
-    def show_state_field_editor(self, state_name, field_name):
-        frame = ttk.LabelFrame(self.right_panel, text=f"State: {state_name} - {field_name}")
-        frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        
-        state_data = self.config_data['states'][state_name]
-        field_value = state_data.get(field_name, '')
-        
-        if field_name == 'prompt':
-            # Text area for prompt
-            text_widget = scrolledtext.ScrolledText(frame, wrap=tk.WORD)
-            text_widget.insert(tk.END, field_value)
-            text_widget.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-            
-            save_btn = ttk.Button(frame, text="Update", 
-                                 command=lambda: self.update_state_field(state_name, field_name, text_widget.get("1.0", tk.END)))
-            save_btn.pack(pady=10)
-        
-        elif field_name == 'temperature':
-            # Slider for temperature
-            temp_label = ttk.Label(frame, text="Temperature (0.0 - 1.0):")
-            temp_label.pack(pady=(20, 10))
-            
-            temp_var = tk.DoubleVar(value=field_value)
-            temp_slider = ttk.Scale(frame, from_=0.0, to=1.0, variable=temp_var, orient=tk.HORIZONTAL, length=300)
-            temp_slider.pack(pady=10)
-            
-            temp_value = ttk.Label(frame, textvariable=temp_var)
-            temp_value.pack(pady=10)
-            
-            save_btn = ttk.Button(frame, text="Update", 
-                                 command=lambda: self.update_state_field(state_name, field_name, temp_var.get()))
-            save_btn.pack(pady=20)
-        
-        elif field_name == 'model':
-            # Entry for model name
-            model_label = ttk.Label(frame, text="Model:")
-            model_label.pack(pady=(20, 10))
-            
-            model_var = tk.StringVar(value=field_value)
-            model_entry = ttk.Entry(frame, textvariable=model_var, width=40)
-            model_entry.pack(pady=10)
-            
-            # Add common model options
-            model_options = ["llama3-70b-8192", "qwen/qwen-2.5-72b-instruct", "gpt-4o", "claude-3-opus-20240229"]
-            model_label = ttk.Label(frame, text="Common Models:")
-            model_label.pack(pady=(20, 10))
-            
-            model_listbox = tk.Listbox(frame, height=5)
-            for model in model_options:
-                model_listbox.insert(tk.END, model)
-            model_listbox.pack(pady=10)
-            
-            # Double click to select
-            model_listbox.bind("<Double-1>", lambda e: model_var.set(model_listbox.get(model_listbox.curselection())))
-            
-            save_btn = ttk.Button(frame, text="Update", 
-                                 command=lambda: self.update_state_field(state_name, field_name, model_var.get()))
-            save_btn.pack(pady=20)
-        
-        elif field_name == 'transitions':
-            # Multi-select for transitions
-            trans_label = ttk.Label(frame, text="Allowed Transitions:")
-            trans_label.pack(pady=(20, 10))
-            
-            # Create checkbuttons for all available states
-            trans_vars = {}
-            trans_frame = ttk.Frame(frame)
-            trans_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
-            
-            all_states = list(self.config_data['states'].keys())
-            current_transitions = field_value
-            
-            for i, state in enumerate(all_states):
-                var = tk.BooleanVar(value=state in current_transitions)
-                trans_vars[state] = var
-                check = ttk.Checkbutton(trans_frame, text=state, variable=var)
-                check.grid(row=i//2, column=i%2, sticky=tk.W, padx=10, pady=5)
-            
-            save_btn = ttk.Button(frame, text="Update", 
-                                 command=lambda: self.update_transitions(state_name, trans_vars))
-            save_btn.pack(pady=20)
-    
-    def update_state_field(self, state_name, field_name, new_value):
-        if field_name == 'prompt':
-            new_value = new_value.strip()
-        
-        self.config_data['states'][state_name][field_name] = new_value
-        messagebox.showinfo("Success", f"Updated {field_name} for state {state_name}")
-        
-        # If we updated transitions, refresh the graph
-        if field_name == 'transitions':
-            self.update_graph()
-    
-    def update_transitions(self, state_name, trans_vars):
-        # Get all selected states
-        transitions = [state for state, var in trans_vars.items() if var.get()]
-        self.config_data['states'][state_name]['transitions'] = transitions
-        messagebox.showinfo("Success", f"Updated transitions for state {state_name}")
-        self.update_graph()  # Refresh the graph with new transitions
-    
-    def add_state(self):
-        # Create a dialog to add a new state
-        dialog = tk.Toplevel(self.root)
-        dialog.title("Add New State")
-        dialog.geometry("400x300")
-        dialog.transient(self.root)
-        dialog.grab_set()
-        
-        ttk.Label(dialog, text="New State Name:").pack(pady=(20, 5))
-        
-        name_var = tk.StringVar()
-        name_entry = ttk.Entry(dialog, textvariable=name_var, width=30)
-        name_entry.pack(pady=5)
-        
-        ttk.Label(dialog, text="Template (optional):").pack(pady=(20, 5))
-        
-        template_var = tk.StringVar()
-        template_options = ["Empty"] + list(self.config_data['states'].keys())
-        template_dropdown = ttk.Combobox(dialog, textvariable=template_var, values=template_options)
-        template_dropdown.pack(pady=5)
-        template_dropdown.current(0)
-        
-        def on_add():
-            state_name = name_var.get().strip()
-            if not state_name:
-                messagebox.showerror("Error", "State name cannot be empty")
-                return
-            
-            if state_name in self.config_data['states']:
-                messagebox.showerror("Error", f"State '{state_name}' already exists")
-                return
-            
-            # Create new state
-            if template_var.get() == "Empty":
-                self.config_data['states'][state_name] = {
-                    'prompt': f"This is the prompt for {state_name} state.",
-                    'temperature': 0.7,
-                    'model': 'qwen/qwen-2.5-72b-instruct',
-                    'transitions': []
-                }
-            else:
-                # Clone from template
-                template = template_var.get()
-                self.config_data['states'][state_name] = dict(self.config_data['states'][template])
-            
-            self.populate_tree()
-            self.update_graph()  # Refresh the graph with new state
-            messagebox.showinfo("Success", f"Added new state: {state_name}")
-            dialog.destroy()
-        
-        ttk.Button(dialog, text="Add", command=on_add).pack(pady=20)
-    
-    def delete_state(self, state_name):
-        if not state_name:
-            messagebox.showerror("Error", "No state selected")
-            return
-        
-        if state_name not in self.config_data['states']:
-            messagebox.showerror("Error", f"State '{state_name}' not found")
-            return
-        
-        # Confirm deletion
-        confirm = messagebox.askyesno("Confirm Deletion", f"Are you sure you want to delete state '{state_name}'?")
-        if not confirm:
-            return
-        
-        # Check if this is the initial state
-        if self.config_data.get('initial_state') == state_name:
-            messagebox.showerror("Error", f"Cannot delete initial state '{state_name}'. Change the initial state first.")
-            return
-        
-        # Remove state
-        del self.config_data['states'][state_name]
-        
-        # Update transitions in other states
-        for other_state in self.config_data['states'].values():
-            if 'transitions' in other_state and state_name in other_state['transitions']:
-                other_state['transitions'].remove(state_name)
-        
-        self.populate_tree()
-        self.update_graph()  # Refresh the graph without the deleted state
-        messagebox.showinfo("Success", f"Deleted state: {state_name}")
-    
-    def edit_state(self, state_name):
-        if not state_name:
-            messagebox.showerror("Error", "No state selected")
-            return
-        
-        if state_name not in self.config_data['states']:
-            messagebox.showerror("Error", f"State '{state_name}' not found")
-            return
-        
-        # Find the state item in the tree and select it
-        for state_item in self.tree.get_children():
-            if self.tree.item(state_item, "text") == "States":
-                for child in self.tree.get_children(state_item):
-                    if self.tree.item(child, "text") == state_name:
-                        self.tree.selection_set(child)
-                        self.tree.see(child)
-                        self.on_tree_select(None)
-                        return
-    
-    def save_config(self):
-        try:
-            # Convert to TOML and save
-            with open(self.config_path, "wb") as f:
-                tomli_write.dump(self.config_data, f)
-            messagebox.showinfo("Success", f"Configuration saved to {self.config_path}")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to save configuration: {str(e)}")
-
-def main():
-    if len(sys.argv) > 1:
-        config_path = sys.argv[1]
-    else:
-        # Default to the sample config
-        config_path = "agent_config.toml"
-    
-    if not os.path.exists(config_path):
-        print(f"Error: Config file '{config_path}' not found.")
-        return
-    
-    root = tk.Tk()
-    app = ConfigEditorApp(root, config_path)
-    root.mainloop()
-
-if __name__ == "__main__":
+import io
+import os
+import sys
+import hashlib
+import pathlib
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from _config_cache import load_config_cached
+
+# Tk is imported just before the window is built so error-and-exit
+# launches (bad path, --help style usage) skip its startup cost
+tk = None
+ttk = None
+scrolledtext = None
+messagebox = None
+
+
+def _ensure_tk():
+    """Import tkinter and friends on first real use."""
+    global tk, ttk, scrolledtext, messagebox
+    if tk is None:
+        import tkinter
+        from tkinter import ttk as _ttk, scrolledtext as _scrolledtext, \
+            messagebox as _messagebox
+        tk = tkinter
+        ttk = _ttk
+        scrolledtext = _scrolledtext
+        messagebox = _messagebox
+# networkx (which drags in numpy, and scipy inside the layout helpers) is
+# imported lazily on first graph update so the editor window appears
+# without paying tens of MB and hundreds of ms of import cost up front
+nx = None
+_LAYOUTS = None
+
+
+def _ensure_graph_libs():
+    """Import networkx and build the layout table on first graph use."""
+    global nx, _LAYOUTS
+    if nx is not None:
+        return
+    import networkx
+    nx = networkx
+    # Layout dispatch table, built once: a dict hit replaces a per-call
+    # if/elif string-compare chain, and seeds are baked in with partial
+    _LAYOUTS = {
+        "spring": partial(nx.spring_layout, seed=42),
+        "circular": nx.circular_layout,
+        "kamada_kawai": _kamada_kawai_lbfgs,
+        "planar": _safe_planar,
+        "random": partial(nx.random_layout, seed=42),
+        "shell": nx.shell_layout,
+        "spectral": nx.spectral_layout,
+    }
+
+# Choose the appropriate TOML library based on Python version
+try:
+    import tomllib  # Python 3.11+
+    import tomli_w as tomli_write  # For writing TOML
+except ImportError:
+    import tomli as tomllib  # Python 3.10 and below
+    import tomli_w as tomli_write  # For writing TOML
+
+
+def _kamada_kawai_lbfgs(G, dist_matrix=None, dist_cache=None):
+    """Kamada-Kawai layout driven by SciPy's L-BFGS-B minimizer.
+
+    NetworkX's implementation loops over vertices in Python per Newton
+    iteration; here the spring energy and its gradient are evaluated as whole
+    NumPy broadcast expressions, so the inner O(V^2) work runs in compiled
+    code. A precomputed all-pairs distance matrix can be passed in to skip
+    the Floyd-Warshall pass, or a ``dist_cache`` dict can be supplied to
+    memoize the matrix per topology across repeated layout runs.
+    """
+    import numpy as np
+    from scipy.optimize import minimize
+    from scipy.sparse.csgraph import floyd_warshall
+
+    nodes = list(G.nodes)
+    n = len(nodes)
+    if n == 0:
+        return {}
+    if n == 1:
+        return {nodes[0]: np.zeros(2)}
+
+    if dist_matrix is None:
+        # The all-pairs matrix depends only on the topology (and the node
+        # ordering it was built with), so it survives pure layout changes
+        dist_key = (tuple(nodes), frozenset(G.edges))
+        if dist_cache is not None:
+            dist_matrix = dist_cache.get(dist_key)
+        if dist_matrix is None:
+            dist_matrix = floyd_warshall(
+                nx.to_scipy_sparse_array(G, nodelist=nodes), directed=False
+            )
+            if dist_cache is not None:
+                dist_cache[dist_key] = dist_matrix
+    d = np.array(dist_matrix, dtype=float)
+    # Give disconnected pairs a finite ideal distance so they spread apart
+    finite = np.isfinite(d)
+    max_dist = d[finite].max() if n > 1 and finite.any() else 1.0
+    d[~finite] = max_dist * 2 if max_dist > 0 else 1.0
+    np.fill_diagonal(d, 0.0)
+
+    ideal = d  # l_ij with unit edge length L = 1
+    with np.errstate(divide="ignore"):
+        strength = 1.0 / (d ** 2)  # k_ij
+    np.fill_diagonal(strength, 0.0)
+
+    # Prefer the Numba-compiled pair loop when available; it runs the O(V^2)
+    # inner loop at native speed with a parallel outer loop
+    try:
+        from _kk_energy_jit import energy_grad as jit_energy_grad
+    except ImportError:
+        jit_energy_grad = None
+
+    if jit_energy_grad is not None:
+        def energy_grad(x):
+            p = np.ascontiguousarray(x).reshape(n, 2)
+            energy, grad = jit_energy_grad(p, ideal, strength)
+            return energy, grad.ravel()
+    else:
+        def energy_grad(x):
+            p = x.reshape(n, 2)
+            delta = p[:, None, :] - p[None, :, :]
+            dist = np.sqrt((delta ** 2).sum(-1))
+            np.fill_diagonal(dist, 1.0)  # strength diagonal is zero anyway
+            offset = dist - ideal
+            energy = 0.5 * (strength * offset ** 2).sum()
+            coeff = 2.0 * strength * offset / dist
+            grad = (coeff[:, :, None] * delta).sum(axis=1)
+            return energy, grad.ravel()
+
+    # Warm-start from a circular arrangement, as networkx does
+    circle = nx.circular_layout(G)
+    p0 = np.array([circle[node] for node in nodes])
+    result = minimize(energy_grad, p0.ravel(), jac=True, method="L-BFGS-B",
+                      options={"maxiter": 200})
+    p = result.x.reshape(n, 2)
+
+    # Rescale to the [-1, 1] box used by the other layouts
+    p -= p.mean(axis=0)
+    span = np.abs(p).max()
+    if span > 0:
+        p /= span
+    return dict(zip(nodes, p))
+
+def _safe_planar(G):
+    """Planar layout, falling back to spring when the graph is not planar."""
+    try:
+        return nx.planar_layout(G)
+    except nx.NetworkXException:
+        return nx.spring_layout(G, seed=42)
+
+
+class ConfigEditorApp:
+    def __init__(self, root, config_path):
+        _ensure_tk()  # No-op under main(); covers direct construction
+        self.root = root
+        self.root.title("Agent Config Editor")
+        self.root.geometry("1200x800")
+        self.config_path = config_path
+        self.config_data = None
+
+        # Cache of the last parsed file: an unchanged mtime skips the disk
+        # read entirely, and an unchanged content digest (e.g. after our own
+        # atomic save bumps the mtime) skips the TOML parse
+        self._config_mtime_ns = None
+        self._config_sha = None
+
+        # Create main frame with notebook for tabs
+        self.notebook = ttk.Notebook(root)
+        self.notebook.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        
+        # Create editor tab
+        self.editor_frame = ttk.Frame(self.notebook)
+        self.notebook.add(self.editor_frame, text="Editor")
+        
+        # Create visualization tab
+        self.graph_frame = ttk.Frame(self.notebook)
+        self.notebook.add(self.graph_frame, text="State Visualization")
+        
+        # Setup the editor interface
+        self.setup_editor_interface()
+        
+        # Setup the graph visualization interface
+        self.setup_graph_interface()
+        
+        # Load initial configuration
+        self.load_config()
+        
+    def setup_editor_interface(self):
+        # Create main frame
+        self.main_frame = ttk.Frame(self.editor_frame)
+        self.main_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        # Create left panel for navigation
+        self.left_panel = ttk.Frame(self.main_frame, width=300)
+        self.left_panel.pack(side=tk.LEFT, fill=tk.Y, padx=(0, 10))
+        
+        # Create right panel for editing
+        self.right_panel = ttk.Frame(self.main_frame)
+        self.right_panel.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
+
+        # Built editor panels cached by tree-item key; selecting a node
+        # swaps panels instead of rebuilding its widgets
+        self._editor_panels = {}
+        self._visible_editor = None
+        
+        # Create treeview for navigation
+        self.tree = ttk.Treeview(self.left_panel)
+        self.tree.pack(fill=tk.BOTH, expand=True)
+        self.tree.bind("<<TreeviewSelect>>", self.on_tree_select)
+
+        # Maps config value-path tuples to Tk item IDs so populate_tree can
+        # diff instead of rebuilding the whole tree on every update
+        self._tree_index = {}
+        
+        # Create frame for buttons
+        self.btn_frame = ttk.Frame(self.left_panel)
+        self.btn_frame.pack(fill=tk.X, pady=10)
+        
+        # Create buttons
+        self.save_btn = ttk.Button(self.btn_frame, text="Save", command=self.save_config)
+        self.save_btn.pack(side=tk.LEFT, padx=5)
+        
+        self.reload_btn = ttk.Button(self.btn_frame, text="Reload", command=self.load_config)
+        self.reload_btn.pack(side=tk.LEFT, padx=5)
+        
+        self.add_state_btn = ttk.Button(self.btn_frame, text="Add State", command=self.add_state)
+        self.add_state_btn.pack(side=tk.LEFT, padx=5)
+    
+    def setup_graph_interface(self):
+        # Create controls frame at the top
+        self.graph_controls = ttk.Frame(self.graph_frame)
+        self.graph_controls.pack(fill=tk.X, padx=10, pady=10)
+        
+        # Add refresh button
+        self.refresh_graph_btn = ttk.Button(self.graph_controls, text="Refresh Graph", command=self.update_graph)
+        self.refresh_graph_btn.pack(side=tk.LEFT, padx=5)
+        
+        # Add layout options
+        ttk.Label(self.graph_controls, text="Layout:").pack(side=tk.LEFT, padx=(20, 5))
+        self.layout_var = tk.StringVar(value="spring")
+        layouts = ["spring", "circular", "kamada_kawai", "planar", "random", "shell", "spectral"]
+        self.layout_combo = ttk.Combobox(self.graph_controls, textvariable=self.layout_var, values=layouts)
+        self.layout_combo.pack(side=tk.LEFT, padx=5)
+        self.layout_combo.bind("<<ComboboxSelected>>", lambda e: self.update_graph())
+        
+        # Create frame for the graph
+        self.graph_container = ttk.Frame(self.graph_frame)
+        self.graph_container.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        # Native Tk canvas: dots, lines, and text need neither Agg
+        # rasterization nor the FigureCanvasTkAgg photo-blit bridge, and
+        # canvas items move in O(1) via coords()
+        self.canvas = tk.Canvas(self.graph_container, background='white',
+                                highlightthickness=0)
+        self.canvas.pack(fill=tk.BOTH, expand=True)
+        # Re-project the cached layout into the new pixel box on resize
+        self.canvas.bind('<Configure>', self._on_canvas_resize)
+        self.G = None
+
+        # Layout positions memoized on (layout, nodes, edges); edits that do
+        # not change topology (prompts, temperatures) reuse the cached layout
+        self._pos_cache = {}
+        # All-pairs shortest-path matrices keyed per topology; shared across
+        # layout switches since the graph distances do not change with them
+        self._dist_cache = {}
+
+        # Canvas item ids reused across draws; items are only created when
+        # the topology grows and only deleted when it shrinks
+        self._node_items = {}    # state name -> oval id
+        self._label_items = {}   # state name -> text id
+        self._edge_items = {}    # (src, dst) -> line id
+        self._chrome_items = []  # title and legend, created once
+        self._last_pos = None    # layout positions of the last draw
+
+        # Pending after() callback ID used to debounce graph updates
+        self._graph_update_pending = None
+
+        # Layout runs on a worker thread so Floyd-Warshall and the layout
+        # iteration never freeze the Tk event loop; drawing is marshalled
+        # back onto the main thread via root.after
+        self._layout_pool = ThreadPoolExecutor(max_workers=1)
+        
+    def load_config(self):
+        try:
+            mtime_ns = os.stat(self.config_path).st_mtime_ns
+            if self.config_data is None or mtime_ns != self._config_mtime_ns:
+                # Read the whole file once; reparse only when the content
+                # digest actually changed (a touched mtime alone is not
+                # enough to defeat the cache)
+                data = pathlib.Path(self.config_path).read_bytes()
+                digest = hashlib.blake2b(data, digest_size=8).digest()
+                if self.config_data is None or digest != self._config_sha:
+                    # The on-disk pickle cache usually satisfies this
+                    # without running the TOML tokenizer at all
+                    self.config_data = load_config_cached(
+                        self.config_path,
+                        lambda raw: tomllib.loads(raw.decode("utf-8")))
+                    self._invalidate_editor_cache()
+                self._config_mtime_ns = mtime_ns
+                self._config_sha = digest
+            self.populate_tree()
+            self.update_graph()
+            messagebox.showinfo("Success", "Configuration loaded successfully")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to load configuration: {str(e)}")
+    
+    def populate_tree(self):
+        # Sync the treeview with config_data incrementally: reuse existing
+        # items, update text only when it changed, and delete what is gone,
+        # instead of tearing the whole tree down on every mutation
+        expected = [(("root",), None, "Configuration Root", ["root"])]
+
+        # Add basic configuration
+        if "initial_state" in self.config_data:
+            expected.append((("initial_state",), ("root",),
+                             f"Initial State: {self.config_data['initial_state']}", ["initial_state"]))
+
+        # Add description
+        if "description" in self.config_data:
+            expected.append((("description",), ("root",), "Description", ["description"]))
+            for key in self.config_data["description"]:
+                expected.append((("description", key), ("description",), key, ["description", key]))
+
+        # Add states
+        if "states" in self.config_data:
+            expected.append((("states",), ("root",), "States", ["states"]))
+            for state_name in self.config_data["states"]:
+                expected.append((("states", state_name), ("states",), state_name, ["states", state_name]))
+                for key in self.config_data["states"][state_name]:
+                    expected.append((("states", state_name, key), ("states", state_name),
+                                     key, ["states", state_name, key]))
+
+        seen = set()
+        for path, parent, text, values in expected:
+            seen.add(path)
+            item_id = self._tree_index.get(path)
+            if item_id is None:
+                parent_id = self._tree_index[parent] if parent else ""
+                self._tree_index[path] = self.tree.insert(parent_id, "end", text=text, values=values)
+            elif self.tree.item(item_id, "text") != text:
+                self.tree.item(item_id, text=text)
+
+        # Deleting a parent also deletes its children, so skip IDs that are
+        # already gone
+        obsolete_ids = [self._tree_index.pop(path) for path in list(self._tree_index) if path not in seen]
+        still_present = [item_id for item_id in obsolete_ids if self.tree.exists(item_id)]
+        if still_present:
+            self.tree.delete(*still_present)
+
+        # Expand all
+        self.tree.item(self._tree_index[("root",)], open=True)
+    
+    def _compute_layout(self, G, layout_name):
+        """Run the selected layout algorithm and return the position dict."""
+        layout = _LAYOUTS.get(layout_name, _LAYOUTS["spring"])
+        if layout is _kamada_kawai_lbfgs:
+            # Only this layout benefits from the per-instance distance cache
+            pos = layout(G, dist_cache=self._dist_cache)
+        elif layout_name == "spring":
+            pos = self._spring_layout(G)
+        else:
+            pos = layout(G)
+        # Layouts disagree about their native range (random_layout fills
+        # the unit square, most others roughly [-1, 1]); recenter and
+        # rescale everything to the [-1, 1] box the pixel projection in
+        # _draw_graph assumes
+        return nx.rescale_layout_dict(pos) if pos else pos
+
+    def _spring_layout(self, G):
+        """Spring layout warm-started from the previous draw's geometry.
+
+        After an incremental edit, seeding Fruchterman-Reingold with the
+        last positions and fixing the surviving nodes lets the few new
+        ones diffuse into place in 10 iterations instead of re-converging
+        the whole graph from scratch; a cold start is only needed when
+        more than 20% of the nodes changed.
+        """
+        last = self._last_pos
+        if last:
+            known = last.keys() & set(G.nodes)
+            if known and len(known) >= 0.8 * G.number_of_nodes():
+                pos = {n: tuple(last[n]) for n in known}
+                fixed = list(known) if len(known) < G.number_of_nodes() else None
+                return nx.spring_layout(G, pos=pos, fixed=fixed,
+                                        iterations=10, seed=42)
+        return nx.spring_layout(G, seed=42)
+
+    def update_graph(self):
+        # Debounce: mutators may call this freely; a burst of rapid edits
+        # (e.g. toggling several transition checkboxes) collapses into one
+        # layout-and-draw 50 ms after the last call
+        if self._graph_update_pending is not None:
+            self.root.after_cancel(self._graph_update_pending)
+        self._graph_update_pending = self.root.after(50, self._run_pending_graph_update)
+
+    def _run_pending_graph_update(self):
+        self._graph_update_pending = None
+        self._update_graph_now()
+
+    def _update_graph_now(self):
+        if not self.config_data or 'states' not in self.config_data:
+            return
+
+        # First graph update pays the networkx import; the window is
+        # already on screen by then
+        _ensure_graph_libs()
+
+        # The graph object is created once and diffed in place thereafter
+        if self.G is None:
+            self.G = nx.DiGraph()
+
+        # Diff nodes and edges against the config instead of rebuilding
+        states = self.config_data['states']
+        initial_state = self.config_data.get('initial_state')
+
+        new_nodes = states.keys()
+        old_nodes = set(self.G.nodes)
+        self.G.remove_nodes_from(old_nodes - new_nodes)
+        # One call adds missing nodes and refreshes the initial-state
+        # highlight attribute on existing ones
+        self.G.add_nodes_from((s, {'initial': s == initial_state}) for s in states)
+
+        new_edges = {
+            (state_name, target)
+            for state_name, state_data in states.items()
+            for target in state_data.get('transitions', ())
+            if target in states
+        }
+        old_edges = set(self.G.edges)
+        self.G.remove_edges_from(old_edges - new_edges)
+        self.G.add_edges_from(new_edges - old_edges)
+
+        G = self.G
+
+        # Layout algorithms are O(V^2)-O(V^3); reuse cached positions when
+        # neither the layout choice nor the topology changed
+        layout_name = self.layout_var.get()
+        topo_key = (layout_name, frozenset(G.nodes), frozenset(G.edges))
+        pos = self._pos_cache.get(topo_key)
+        if pos is not None:
+            # Cache hit: drawing alone is cheap, do it inline
+            self._draw_graph(G, pos)
+            return
+
+        # Cache miss: run the layout on the worker thread. The worker gets
+        # a snapshot copy so later edits on the main thread cannot race the
+        # layout iteration; the result is marshalled back via root.after
+        # because Tk and matplotlib must only be touched from the main loop
+        snapshot = G.copy()
+        future = self._layout_pool.submit(self._compute_layout, snapshot, layout_name)
+        future.add_done_callback(
+            lambda f: self.root.after(0, self._apply_layout, topo_key, f))
+
+    def _apply_layout(self, topo_key, future):
+        """Store a worker-computed layout and draw it (main thread only)."""
+        try:
+            pos = future.result()
+        except Exception as e:
+            print(f"Graph layout failed: {e}")
+            return
+        self._pos_cache[topo_key] = pos
+        # The config may have changed while the layout ran; only draw if
+        # this result still matches the current layout choice and topology
+        current_key = (self.layout_var.get(),
+                       frozenset(self.G.nodes), frozenset(self.G.edges))
+        if current_key == topo_key:
+            self._draw_graph(self.G, pos)
+
+    def _on_canvas_resize(self, event):
+        # The layout is resolution-independent; a resize only needs the
+        # cached positions re-projected into the new pixel box
+        if self.G is not None and self._last_pos is not None:
+            self._draw_graph(self.G, self._last_pos)
+
+    def _draw_chrome(self, width):
+        """Create the static title and legend items once, then just move them."""
+        canvas = self.canvas
+        if not self._chrome_items:
+            self._chrome_items = [
+                canvas.create_text(0, 20, text="State Machine Visualization",
+                                   font=('sans-serif', 16), anchor='n'),
+                canvas.create_oval(0, 0, 0, 0, fill='lightgreen', outline='gray'),
+                canvas.create_text(0, 0, text="Initial State",
+                                   font=('sans-serif', 10), anchor='w'),
+                canvas.create_oval(0, 0, 0, 0, fill='skyblue', outline='gray'),
+                canvas.create_text(0, 0, text="Regular State",
+                                   font=('sans-serif', 10), anchor='w'),
+            ]
+        title, init_dot, init_text, reg_dot, reg_text = self._chrome_items
+        canvas.coords(title, width / 2, 10)
+        canvas.coords(init_dot, width - 130, 14, width - 114, 30)
+        canvas.coords(init_text, width - 108, 22)
+        canvas.coords(reg_dot, width - 130, 38, width - 114, 54)
+        canvas.coords(reg_text, width - 108, 46)
+
+    def _draw_graph(self, G, pos):
+        """Render the graph as native canvas items, diffing against the
+        previous draw.
+
+        Ovals, lines, and text items persist between updates: moves go
+        through canvas.coords (O(1) per item, no rasterization pass), and
+        items are only created when the topology grows and deleted when it
+        shrinks.
+        """
+        canvas = self.canvas
+        self._last_pos = pos
+
+        width = canvas.winfo_width()
+        height = canvas.winfo_height()
+        if width <= 1 or height <= 1:
+            # Not mapped yet; the <Configure> binding redraws once it is
+            return
+
+        # Project layout coordinates ([-1, 1] box) into pixels, leaving a
+        # margin for node radii and the title/legend band
+        pad = 50
+        span_x = max(width - 2 * pad, 1)
+        span_y = max(height - 2 * pad, 1)
+
+        def to_pixels(p):
+            return (pad + (p[0] + 1.0) * 0.5 * span_x,
+                    pad + (1.0 - p[1]) * 0.5 * span_y)
+
+        # Drop items whose node or edge disappeared
+        for name in list(self._node_items):
+            if name not in G:
+                canvas.delete(self._node_items.pop(name))
+                canvas.delete(self._label_items.pop(name))
+        edges = set(G.edges)
+        for key in list(self._edge_items):
+            if key not in edges:
+                canvas.delete(self._edge_items.pop(key))
+
+        # Edges: straight lines with native arrowheads; self-transitions
+        # get a smoothed loop bulging out to the node's right (a zero-length
+        # line would vanish under the node oval), with the same arrowhead
+        for u, v in edges:
+            x1, y1 = to_pixels(pos[u])
+            item = self._edge_items.get((u, v))
+            if u == v:
+                r = 18 if G.nodes[u].get('initial') else 15
+                coords = (x1 + r * 0.7, y1 - r * 0.7,
+                          x1 + r * 2.4, y1 - r * 1.3,
+                          x1 + r * 3.0, y1,
+                          x1 + r * 2.4, y1 + r * 1.3,
+                          x1 + r * 0.7, y1 + r * 0.7)
+            else:
+                coords = (x1, y1) + to_pixels(pos[v])
+            if item is None:
+                self._edge_items[(u, v)] = canvas.create_line(
+                    *coords, fill='gray25', width=1, smooth=(u == v),
+                    arrow=tk.LAST, arrowshape=(10, 12, 5))
+            else:
+                canvas.coords(item, *coords)
+
+        # Nodes and labels
+        for name in G.nodes:
+            x, y = to_pixels(pos[name])
+            initial = G.nodes[name].get('initial')
+            r = 18 if initial else 15
+            color = 'lightgreen' if initial else 'skyblue'
+            item = self._node_items.get(name)
+            if item is None:
+                self._node_items[name] = canvas.create_oval(
+                    x - r, y - r, x + r, y + r, fill=color, outline='gray')
+                self._label_items[name] = canvas.create_text(
+                    x, y - r - 8, text=name, font=('sans-serif', 10))
+            else:
+                canvas.coords(item, x - r, y - r, x + r, y + r)
+                canvas.itemconfig(item, fill=color)
+                canvas.coords(self._label_items[name], x, y - r - 8)
+
+        # Keep stacking order: edges under nodes, labels on top
+        for item in self._node_items.values():
+            canvas.tag_raise(item)
+        for item in self._label_items.values():
+            canvas.tag_raise(item)
+
+        self._draw_chrome(width)
+    
+    def _invalidate_editor_cache(self, state_name=None):
+        """Drop cached editor panels, optionally only those for one state.
+
+        With a state filter the visible panel survives, so invalidating
+        from its own Update button does not blank the UI; a full
+        invalidation (reload, add/delete state) drops everything.
+        """
+        for key in list(self._editor_panels):
+            if state_name is not None:
+                if state_name not in key[1:] or key == self._visible_editor:
+                    continue
+            panel = self._editor_panels.pop(key)
+            if panel.winfo_exists():
+                panel.destroy()
+        if state_name is None:
+            self._visible_editor = None
+
+    def _invalidate_editor_group(self, *groups):
+        """Drop cached panels whose tree key starts with any of ``groups``.
+
+        Like the per-state invalidation, the visible panel survives so a
+        mutator can be triggered from the panel it lives in.
+        """
+        for key in list(self._editor_panels):
+            if key[0] not in groups or key == self._visible_editor:
+                continue
+            panel = self._editor_panels.pop(key)
+            if panel.winfo_exists():
+                panel.destroy()
+
+    def on_tree_select(self, event):
+        # Get selected item
+        selected_item = self.tree.selection()[0]
+        values = self.tree.item(selected_item, "values")
+
+        if not values:
+            return
+
+        # Swap cached panels in and out instead of destroying and
+        # rebuilding the whole widget tree on every click; each tree click
+        # then costs two Tcl calls instead of O(widgets)
+        key = tuple(values)
+        if key == self._visible_editor:
+            return
+        current = self._editor_panels.get(self._visible_editor)
+        if current is not None and current.winfo_exists():
+            current.pack_forget()
+        self._visible_editor = key
+
+        panel = self._editor_panels.get(key)
+        if panel is not None and panel.winfo_exists():
+            panel.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+            return
+
+        # Cache miss: build the editor, then remember the frame it packed
+        self._show_editor_for(values)
+        children = self.right_panel.winfo_children()
+        if children:
+            self._editor_panels[key] = children[-1]
+
+    def _show_editor_for(self, values):
+        # Show appropriate editor based on selection
+        if values[0] == "root":
+            self.show_root_editor()
+        elif values[0] == "initial_state":
+            self.show_initial_state_editor()
+        elif values[0] == "description":
+            if len(values) > 1:
+                self.show_description_field_editor(values[1])
+            else:
+                self.show_description_editor()
+        elif values[0] == "states":
+            if len(values) == 1:
+                self.show_states_editor()
+            elif len(values) == 2:
+                self.show_state_editor(values[1])
+            elif len(values) == 3:
+                self.show_state_field_editor(values[1], values[2])
+    
+    def show_root_editor(self):
+        frame = ttk.LabelFrame(self.right_panel, text="Configuration Overview")
+        frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        # Show configuration summary
+        info_text = f"""
+        Configuration File: {self.config_path}
+        Initial State: {self.config_data.get('initial_state', 'Not set')}
+        Number of States: {len(self.config_data.get('states', {}))}
+        
+        States:
+        {', '.join(list(self.config_data.get('states', {}).keys()))}
+        """
+        
+        info_label = ttk.Label(frame, text=info_text, justify=tk.LEFT, padding=10)
+        info_label.pack(fill=tk.BOTH, expand=True)
+    
+    def show_initial_state_editor(self):
+        frame = ttk.LabelFrame(self.right_panel, text="Initial State")
+        frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        # Create dropdown for initial state
+        state_label = ttk.Label(frame, text="Initial State:")
+        state_label.pack(pady=(10, 5))
+        
+        state_var = tk.StringVar(value=self.config_data.get('initial_state', ''))
+        state_dropdown = ttk.Combobox(frame, textvariable=state_var)
+        state_dropdown['values'] = list(self.config_data.get('states', {}).keys())
+        state_dropdown.pack(pady=(0, 10))
+        
+        # Save button
+        save_btn = ttk.Button(frame, text="Update", 
+                             command=lambda: self.update_initial_state(state_var.get()))
+        save_btn.pack(pady=10)
+    
+    def update_initial_state(self, new_state):
+        if not new_state or new_state not in self.config_data.get('states', {}):
+            messagebox.showerror("Error", f"Invalid state: {new_state}")
+            return
+        
+        self.config_data['initial_state'] = new_state
+        # The root overview and the initial-state editor both render this
+        # value; their cached panels are stale now
+        self._invalidate_editor_group('root', 'initial_state')
+        self.populate_tree()
+        self.update_graph()  # Update the graph to show new initial state
+        messagebox.showinfo("Success", f"Initial state updated to {new_state}")
+    
+    def show_description_editor(self):
+        frame = ttk.LabelFrame(self.right_panel, text="Description")
+        frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        # Create a scrolled text widget for each description field
+        for key in self.config_data.get('description', {}):
+            field_frame = ttk.LabelFrame(frame, text=key)
+            field_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+            
+            text_widget = scrolledtext.ScrolledText(field_frame, wrap=tk.WORD, height=10)
+            text_widget.insert(tk.END, self.config_data['description'][key])
+            text_widget.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+            
+            update_btn = ttk.Button(field_frame, text="Update", 
+                                   command=lambda k=key, t=text_widget: self.update_description_field(k, t.get("1.0", tk.END)))
+            update_btn.pack(pady=5)
+    
+    def show_description_field_editor(self, field):
+        frame = ttk.LabelFrame(self.right_panel, text=f"Description - {field}")
+        frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        # Create a scrolled text widget for the description field
+        text_widget = scrolledtext.ScrolledText(frame, wrap=tk.WORD)
+        text_widget.insert(tk.END, self.config_data['description'].get(field, ''))
+        text_widget.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        # Save button
+        save_btn = ttk.Button(frame, text="Update", 
+                             command=lambda: self.update_description_field(field, text_widget.get("1.0", tk.END)))
+        save_btn.pack(pady=10)
+    
+    def update_description_field(self, field, new_text):
+        if 'description' not in self.config_data:
+            self.config_data['description'] = {}
+        
+        self.config_data['description'][field] = new_text.strip()
+        # Both the combined description editor and the per-field editors
+        # show this text; drop their cached panels
+        self._invalidate_editor_group('description')
+        messagebox.showinfo("Success", f"Description field '{field}' updated")
+    
+    def show_states_editor(self):
+        frame = ttk.LabelFrame(self.right_panel, text="States")
+        frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        # Create a listbox of states
+        listbox_frame = ttk.Frame(frame)
+        listbox_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        states_list = list(self.config_data.get('states', {}).keys())
+        listbox = tk.Listbox(listbox_frame)
+        for state in states_list:
+            listbox.insert(tk.END, state)
+        
+        scrollbar = ttk.Scrollbar(listbox_frame, orient=tk.VERTICAL, command=listbox.yview)
+        listbox.configure(yscrollcommand=scrollbar.set)
+        
+        listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        # Buttons for state management
+        btn_frame = ttk.Frame(frame)
+        btn_frame.pack(fill=tk.X, padx=10, pady=10)
+        
+        add_btn = ttk.Button(btn_frame, text="Add State", command=self.add_state)
+        add_btn.pack(side=tk.LEFT, padx=5)
+        
+        del_btn = ttk.Button(btn_frame, text="Delete State", 
+                            command=lambda: self.delete_state(listbox.get(listbox.curselection()) if listbox.curselection() else None))
+        del_btn.pack(side=tk.LEFT, padx=5)
+        
+        edit_btn = ttk.Button(btn_frame, text="Edit State", 
+                             command=lambda: self.edit_state(listbox.get(listbox.curselection()) if listbox.curselection() else None))
+        edit_btn.pack(side=tk.LEFT, padx=5)
+    
+    def show_state_editor(self, state_name):
+        frame = ttk.LabelFrame(self.right_panel, text=f"State: {state_name}")
+        frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        # Create notebook for tabs
+        notebook = ttk.Notebook(frame)
+        notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        # Create tabs for each field; bind the dict chain once instead of
+        # re-resolving it in every widget callback below
+        states = self.config_data['states']
+        state_data = states[state_name]
+        
+        # Prompt tab
+        prompt_tab = ttk.Frame(notebook)
+        notebook.add(prompt_tab, text="Prompt")
+        
+        prompt_text = scrolledtext.ScrolledText(prompt_tab, wrap=tk.WORD)
+        prompt_text.insert(tk.END, state_data.get('prompt', ''))
+        prompt_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        prompt_btn = ttk.Button(prompt_tab, text="Update Prompt", 
+                               command=lambda: self.update_state_field(state_name, 'prompt', prompt_text.get("1.0", tk.END)))
+        prompt_btn.pack(pady=10)
+        
+        # Temperature tab
+        temp_tab = ttk.Frame(notebook)
+        notebook.add(temp_tab, text="Temperature")
+        
+        temp_label = ttk.Label(temp_tab, text="Temperature (0.0 - 1.0):")
+        temp_label.pack(pady=(10, 5))
+        
+        temp_var = tk.DoubleVar(value=state_data.get('temperature', 0.7))
+        temp_slider = ttk.Scale(temp_tab, from_=0.0, to=1.0, variable=temp_var, orient=tk.HORIZONTAL)
+        temp_slider.pack(fill=tk.X, padx=20, pady=5)
+        
+        temp_value = ttk.Label(temp_tab, textvariable=temp_var)
+        temp_value.pack(pady=5)
+        
+        temp_btn = ttk.Button(temp_tab, text="Update Temperature", 
+                             command=lambda: self.update_state_field(state_name, 'temperature', temp_var.get()))
+        temp_btn.pack(pady=10)
+        
+        # Model tab
+        model_tab = ttk.Frame(notebook)
+        notebook.add(model_tab, text="Model")
+        
+        model_label = ttk.Label(model_tab, text="Model:")
+        model_label.pack(pady=(10, 5))
+        
+        model_var = tk.StringVar(value=state_data.get('model', ''))
+        model_entry = ttk.Entry(model_tab, textvariable=model_var, width=40)
+        model_entry.pack(pady=5)
+        
+        model_options = ["llama3-70b-8192", "qwen/qwen-2.5-72b-instruct", "gpt-4o", "claude-3-opus-20240229"]
+        model_dropdown = ttk.Combobox(model_tab, textvariable=model_var, values=model_options)
+        model_dropdown.pack(pady=5)
+        
+        model_btn = ttk.Button(model_tab, text="Update Model", 
+                              command=lambda: self.update_state_field(state_name, 'model', model_var.get()))
+        model_btn.pack(pady=10)
+        
+        # Transitions tab
+        trans_tab = ttk.Frame(notebook)
+        notebook.add(trans_tab, text="Transitions")
+        
+        trans_label = ttk.Label(trans_tab, text="Allowed Transitions (comma-separated):")
+        trans_label.pack(pady=(10, 5))
+        
+        trans_var = tk.StringVar(value=", ".join(state_data.get('transitions', [])))
+        trans_entry = ttk.Entry(trans_tab, textvariable=trans_var, width=40)
+        trans_entry.pack(pady=5)
+        
+        # One virtualized picker instead of one Checkbutton widget per state
+        trans_frame = ttk.Frame(trans_tab)
+        trans_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        # Set membership keeps the build loop O(V) instead of O(V*k)
+        current_transitions = set(state_data.get('transitions', ()))
+        trans_tree = self._build_transitions_picker(trans_frame, states, current_transitions)
+
+        trans_btn = ttk.Button(trans_tab, text="Update Transitions",
+                              command=lambda: self.update_transitions(
+                                  state_name, self._picked_transitions(trans_tree)))
+        trans_btn.pack(pady=10)
+    
+    def show_state_field_editor(self, state_name, field_name):
+        frame = ttk.LabelFrame(self.right_panel, text=f"State: {state_name} - {field_name}")
+        frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        states = self.config_data['states']
+        state_data = states[state_name]
+        field_value = state_data.get(field_name, '')
+        
+        if field_name == 'prompt':
+            # Text area for prompt
+            text_widget = scrolledtext.ScrolledText(frame, wrap=tk.WORD)
+            text_widget.insert(tk.END, field_value)
+            text_widget.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+            
+            save_btn = ttk.Button(frame, text="Update", 
+                                 command=lambda: self.update_state_field(state_name, field_name, text_widget.get("1.0", tk.END)))
+            save_btn.pack(pady=10)
+        
+        elif field_name == 'temperature':
+            # Slider for temperature
+            temp_label = ttk.Label(frame, text="Temperature (0.0 - 1.0):")
+            temp_label.pack(pady=(20, 10))
+            
+            temp_var = tk.DoubleVar(value=field_value)
+            temp_slider = ttk.Scale(frame, from_=0.0, to=1.0, variable=temp_var, orient=tk.HORIZONTAL, length=300)
+            temp_slider.pack(pady=10)
+            
+            temp_value = ttk.Label(frame, textvariable=temp_var)
+            temp_value.pack(pady=10)
+            
+            save_btn = ttk.Button(frame, text="Update", 
+                                 command=lambda: self.update_state_field(state_name, field_name, temp_var.get()))
+            save_btn.pack(pady=20)
+        
+        elif field_name == 'model':
+            # Entry for model name
+            model_label = ttk.Label(frame, text="Model:")
+            model_label.pack(pady=(20, 10))
+            
+            model_var = tk.StringVar(value=field_value)
+            model_entry = ttk.Entry(frame, textvariable=model_var, width=40)
+            model_entry.pack(pady=10)
+            
+            # Add common model options
+            model_options = ["llama3-70b-8192", "qwen/qwen-2.5-72b-instruct", "gpt-4o", "claude-3-opus-20240229"]
+            model_label = ttk.Label(frame, text="Common Models:")
+            model_label.pack(pady=(20, 10))
+            
+            model_listbox = tk.Listbox(frame, height=5)
+            for model in model_options:
+                model_listbox.insert(tk.END, model)
+            model_listbox.pack(pady=10)
+            
+            # Double click to select
+            model_listbox.bind("<Double-1>", lambda e: model_var.set(model_listbox.get(model_listbox.curselection())))
+            
+            save_btn = ttk.Button(frame, text="Update", 
+                                 command=lambda: self.update_state_field(state_name, field_name, model_var.get()))
+            save_btn.pack(pady=20)
+        
+        elif field_name == 'transitions':
+            # Multi-select for transitions
+            trans_label = ttk.Label(frame, text="Allowed Transitions:")
+            trans_label.pack(pady=(20, 10))
+            
+            # One virtualized picker instead of one Checkbutton per state
+            trans_frame = ttk.Frame(frame)
+            trans_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
+
+            trans_tree = self._build_transitions_picker(trans_frame, states, set(field_value))
+
+            save_btn = ttk.Button(frame, text="Update",
+                                 command=lambda: self.update_transitions(
+                                     state_name, self._picked_transitions(trans_tree)))
+            save_btn.pack(pady=20)
+    
+    def update_state_field(self, state_name, field_name, new_value):
+        if field_name == 'prompt':
+            new_value = new_value.strip()
+
+        state_data = self.config_data['states'][state_name]
+        state_data[field_name] = new_value
+        # Other cached editors for this state now show stale values
+        self._invalidate_editor_cache(state_name)
+        messagebox.showinfo("Success", f"Updated {field_name} for state {state_name}")
+        
+        # If we updated transitions, refresh the graph
+        if field_name == 'transitions':
+            self.update_graph()
+    
+    _CHECKED = "☑"
+    _UNCHECKED = "☐"
+
+    def _build_transitions_picker(self, parent, all_states, current):
+        """Build a virtualized transition selector inside ``parent``.
+
+        A single Treeview holds one row per state with a toggled checkbox
+        glyph, so opening the editor allocates two widgets total instead
+        of one Checkbutton (plus BooleanVar) per state.
+        """
+        tree = ttk.Treeview(parent, columns=('allowed',), show='tree headings',
+                            height=min(len(all_states), 12))
+        tree.heading('#0', text='State')
+        tree.heading('allowed', text='Allowed')
+        tree.column('allowed', width=80, anchor='center')
+        for state in all_states:
+            glyph = self._CHECKED if state in current else self._UNCHECKED
+            tree.insert('', 'end', iid=state, text=state, values=(glyph,))
+
+        def toggle(event):
+            row = tree.identify_row(event.y)
+            if row:
+                checked = tree.set(row, 'allowed') == self._CHECKED
+                tree.set(row, 'allowed', self._UNCHECKED if checked else self._CHECKED)
+            return 'break'
+
+        tree.bind('<Button-1>', toggle)
+
+        scrollbar = ttk.Scrollbar(parent, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        return tree
+
+    def _picked_transitions(self, tree):
+        """Collect the checked state names from a transitions picker."""
+        return [row for row in tree.get_children()
+                if tree.set(row, 'allowed') == self._CHECKED]
+
+    def update_transitions(self, state_name, transitions):
+        self.config_data['states'][state_name]['transitions'] = list(transitions)
+        self._invalidate_editor_cache(state_name)
+        messagebox.showinfo("Success", f"Updated transitions for state {state_name}")
+        self.update_graph()  # Refresh the graph with new transitions
+    
+    def add_state(self):
+        # Create a dialog to add a new state
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Add New State")
+        dialog.geometry("400x300")
+        dialog.transient(self.root)
+        dialog.grab_set()
+        
+        ttk.Label(dialog, text="New State Name:").pack(pady=(20, 5))
+        
+        name_var = tk.StringVar()
+        name_entry = ttk.Entry(dialog, textvariable=name_var, width=30)
+        name_entry.pack(pady=5)
+        
+        ttk.Label(dialog, text="Template (optional):").pack(pady=(20, 5))
+        
+        template_var = tk.StringVar()
+        template_options = ["Empty"] + list(self.config_data['states'].keys())
+        template_dropdown = ttk.Combobox(dialog, textvariable=template_var, values=template_options)
+        template_dropdown.pack(pady=5)
+        template_dropdown.current(0)
+        
+        def on_add():
+            state_name = name_var.get().strip()
+            if not state_name:
+                messagebox.showerror("Error", "State name cannot be empty")
+                return
+            
+            if state_name in self.config_data['states']:
+                messagebox.showerror("Error", f"State '{state_name}' already exists")
+                return
+            
+            # Create new state
+            if template_var.get() == "Empty":
+                self.config_data['states'][state_name] = {
+                    'prompt': f"This is the prompt for {state_name} state.",
+                    'temperature': 0.7,
+                    'model': 'qwen/qwen-2.5-72b-instruct',
+                    'transitions': []
+                }
+            else:
+                # Clone from template
+                template = template_var.get()
+                self.config_data['states'][state_name] = dict(self.config_data['states'][template])
+            
+            # Every cached editor's transition list is now incomplete
+            self._invalidate_editor_cache()
+            self.populate_tree()
+            self.update_graph()  # Refresh the graph with new state
+            messagebox.showinfo("Success", f"Added new state: {state_name}")
+            dialog.destroy()
+        
+        ttk.Button(dialog, text="Add", command=on_add).pack(pady=20)
+    
+    def delete_state(self, state_name):
+        if not state_name:
+            messagebox.showerror("Error", "No state selected")
+            return
+        
+        if state_name not in self.config_data['states']:
+            messagebox.showerror("Error", f"State '{state_name}' not found")
+            return
+        
+        # Confirm deletion
+        confirm = messagebox.askyesno("Confirm Deletion", f"Are you sure you want to delete state '{state_name}'?")
+        if not confirm:
+            return
+        
+        # Check if this is the initial state
+        if self.config_data.get('initial_state') == state_name:
+            messagebox.showerror("Error", f"Cannot delete initial state '{state_name}'. Change the initial state first.")
+            return
+        
+        # Remove state
+        del self.config_data['states'][state_name]
+        
+        # Update transitions in other states: one membership probe per
+        # state, and a single-pass rebuild only for lists that contain the
+        # deleted name (list.remove would rescan from the front)
+        for other_state in self.config_data['states'].values():
+            transitions = other_state.get('transitions')
+            if transitions and state_name in transitions:
+                other_state['transitions'] = [t for t in transitions if t != state_name]
+        
+        self._invalidate_editor_cache()
+        self.populate_tree()
+        self.update_graph()  # Refresh the graph without the deleted state
+        messagebox.showinfo("Success", f"Deleted state: {state_name}")
+    
+    def edit_state(self, state_name):
+        if not state_name:
+            messagebox.showerror("Error", "No state selected")
+            return
+        
+        if state_name not in self.config_data['states']:
+            messagebox.showerror("Error", f"State '{state_name}' not found")
+            return
+        
+        # Find the state item in the tree and select it
+        for state_item in self.tree.get_children():
+            if self.tree.item(state_item, "text") == "States":
+                for child in self.tree.get_children(state_item):
+                    if self.tree.item(child, "text") == state_name:
+                        self.tree.selection_set(child)
+                        self.tree.see(child)
+                        self.on_tree_select(None)
+                        return
+    
+    def save_config(self):
+        try:
+            # Serialize fully in memory, then write to a sibling temp file
+            # and os.replace it into place: a crash mid-write can never
+            # leave a truncated config behind
+            buf = io.BytesIO()
+            tomli_write.dump(self.config_data, buf)
+            payload = buf.getvalue()
+            tmp_path = self.config_path + ".tmp"
+            # The payload is fully assembled, so skip Python's buffer layer
+            # and hand it to the OS in one write
+            with open(tmp_path, "wb", buffering=0) as f:
+                f.write(payload)
+            os.replace(tmp_path, self.config_path)
+            # The in-memory config matches the file we just wrote, so refresh
+            # the reload cache and make the next reload a no-op
+            self._config_mtime_ns = os.stat(self.config_path).st_mtime_ns
+            self._config_sha = hashlib.blake2b(payload, digest_size=8).digest()
+            messagebox.showinfo("Success", f"Configuration saved to {self.config_path}")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to save configuration: {str(e)}")
+
+def main():
+    if len(sys.argv) > 1:
+        config_path = sys.argv[1]
+    else:
+        # Default to the sample config
+        config_path = "agent_config.toml"
+    
+    if not os.path.exists(config_path):
+        print(f"Error: Config file '{config_path}' not found.")
+        return
+
+    _ensure_tk()
+    root = tk.Tk()
+    app = ConfigEditorApp(root, config_path)
+    root.mainloop()
+
+if __name__ == "__main__":
     main()
\ No newline at end of file
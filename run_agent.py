@@ -1,109 +1,360 @@
-import os
-from dotenv import load_dotenv
-from agent import AIAgent
-import requests
-
-# Load environment variables from .env file
-load_dotenv()
-
-def search_function(params):
-    """
-    Function that uses SearxNG to search the web for information.
-    
-    Args:
-        params (dict): Dictionary containing the search parameters,
-                      with at least a "query" key.
-    
-    Returns:
-        str: Formatted search results or error message.
-    """
-    
-    
-    query = params.get("query", "")
-    if not query:
-        return "Error: No search query provided."
-    
-    # Define the SearxNG API endpoint
-    base_url = 'https://search.bostonlistener-career.org/search'
-    
-    # Define the search query parameters
-    post_data = {
-        "q": query,
-        "format": "json",
-    }
-    
-    try:
-        # Make the POST request
-        response = requests.post(base_url, data=post_data)
-        
-        # Check response status and format results
-        if response.status_code == 200:
-            search_results = response.json()
-            
-            # Format the results
-            formatted_results = ""
-            
-            if 'results' in search_results and search_results['results']:
-                formatted_results = "Search Results:\n\n"
-                
-                # Take the top 5 results or fewer if less are available
-                for i, result in enumerate(search_results['results'][:5], 1):
-                    title = result.get('title', 'No Title')
-                    url = result.get('url', 'No URL')
-                    content = result.get('content', 'No Description').strip()
-                    
-                    formatted_results += f"{i}. {title}\n"
-                    formatted_results += f"   URL: {url}\n"
-                    formatted_results += f"   Description: {content}\n\n"
-                
-                formatted_results += f"Total results found: {len(search_results['results'])}"
-            else:
-                formatted_results = f"No results found for query: {query}"
-            
-            return formatted_results
-        else:
-            return f"Error: Could not complete search. Status code: {response.status_code}"
-    
-    except Exception as e:
-        return f"Error performing search: {str(e)}"
-
-def calculate_function(params):
-    """
-    Mock calculation function that would be called when the action is "calculate".
-    In a real implementation, this could perform more complex calculations.
-    """
-    expression = params.get("expression", "")
-    print(f"Calculating: {expression}")
-    try:
-        result = eval(expression)
-        return f"Result: {result}"
-    except Exception as e:
-        return f"Could not calculate expression: {str(e)}"
-
-# Usage example
-if __name__ == "__main__":
-    # Get openrouter API key from environment variable or prompt the user
-    openrouter_api_key = os.environ.get("OPENROUTER_API_KEY")
-    
-    if not openrouter_api_key:
-        openrouter_api_key = input("Please enter your openrouter API key: ")
-        if not openrouter_api_key:
-            print("Error: openrouter API key is required.")
-            exit(1)
-    
-    # Prompt user for dev mode
-    dev_mode_input = input("Enable development mode with detailed logging? (y/n): ").strip().lower()
-    dev_mode = dev_mode_input in ['y', 'yes']
-    
-    if dev_mode:
-        print("Starting agent in DEVELOPMENT mode - detailed logs will be shown")
-    
-    # Create the agent with the API key and dev mode flag
-    agent = AIAgent("agent_config.toml", api_key=openrouter_api_key, dev_mode=dev_mode)
-    
-    # Register available actions
-    agent.register_action("search", search_function)
-    agent.register_action("calculate", calculate_function)
-    
-    # Start the agent with an initial user input
-    agent.run("Hello, I need some help.")
\ No newline at end of file
+import os
+import ast
+import math
+import time
+import asyncio
+import functools
+from collections import OrderedDict
+from agent import AIAgent
+
+# Decode SearxNG payloads with orjson when it is installed; the full
+# response is parsed even though only five results are shown, so decoder
+# speed is the function's main CPU cost after the network
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    import json
+    _json_loads = json.loads
+
+# Incremental JSON parsing lets the search stop reading a mirror's
+# response as soon as enough results have arrived; optional, like orjson
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# How many results a search returns to the agent
+MAX_SEARCH_RESULTS = 5
+
+# One shared client for every search: keep-alive skips the TCP+TLS
+# handshake across calls, HTTP/2 multiplexes the parallel mirror probes
+# over one connection per host, and because the function is a coroutine
+# the agent's event loop can overlap the HTTP wait with its other I/O
+_session = None
+
+
+async def _get_session():
+    """Return the shared httpx client, creating it on first use."""
+    global _session
+    if _session is None or _session.is_closed:
+        # Deferred so agents that never search skip the httpx import;
+        # the agent's LLM client already uses httpx, so no new dependency
+        import httpx
+        # httpx only speaks HTTP/2 with the optional h2 package installed
+        # (pip install httpx[http2]); fall back to HTTP/1.1 without it
+        try:
+            import h2  # noqa: F401
+            http2 = True
+        except ImportError:
+            http2 = False
+        _session = httpx.AsyncClient(
+            http2=http2,
+            limits=httpx.Limits(max_connections=100,
+                                max_keepalive_connections=20),
+            timeout=httpx.Timeout(10.0, connect=3.0),
+            headers={"Accept-Encoding": "gzip"},
+        )
+    return _session
+
+
+async def _close_session():
+    """Close the shared client so the event loop shuts down cleanly."""
+    if _session is not None and not _session.is_closed:
+        await _session.aclose()
+
+
+# Public SearxNG mirrors are individually flaky; racing the same query
+# against all of them bounds latency by the fastest mirror instead of
+# gambling on one hard-coded host
+SEARXNG_MIRRORS = [
+    "https://search.bostonlistener-career.org/search",
+    "https://searx.be/search",
+    "https://search.inetol.net/search",
+]
+
+
+# Shared row template for formatted results; format_map with pre-seeded
+# defaults replaces three .get calls per result
+_RESULT_TEMPLATE = "{i}. {title}\n   URL: {url}\n   Description: {content}\n\n"
+_RESULT_DEFAULTS = {"title": "No Title", "url": "No URL",
+                    "content": "No Description"}
+
+
+class _ResultCache:
+    """Bounded LRU cache with a per-entry TTL for formatted search results.
+
+    Agent turns often repeat or revisit queries; a hit returns the cached
+    string in microseconds instead of a full HTTPS round-trip.
+    """
+
+    def __init__(self, max_size=256, ttl=600.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        if key in self._entries:
+            self._entries.move_to_end(key)
+        elif len(self._entries) >= self.max_size:
+            self._entries.popitem(last=False)
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+
+    def clear(self):
+        self._entries.clear()
+
+
+_search_cache = _ResultCache()
+
+
+async def _query_mirror(url, post_data):
+    """POST the query to one mirror; raise unless it answers well-formed.
+
+    With ijson installed the response is parsed incrementally and the
+    body is abandoned after MAX_SEARCH_RESULTS results, so a mirror
+    returning hundreds of hits costs neither the extra bytes nor their
+    decode time; otherwise the whole payload is decoded in one go.
+    """
+    session = await _get_session()
+    async with session.stream("POST", url, data=post_data) as response:
+        if response.status_code != 200:
+            raise RuntimeError(f"{url} returned status {response.status_code}")
+
+        if ijson is None:
+            # Decode from raw bytes: skips charset sniffing and lets
+            # orjson parse 2-3x faster than the stdlib decoder
+            payload = _json_loads(await response.aread())
+            if 'results' not in payload:
+                raise RuntimeError(f"{url} returned a malformed response")
+            return payload
+
+        results = ijson.sendable_list()
+        parser = ijson.items_coro(results, 'results.item')
+        # Buffer the raw bytes only until the first result proves the
+        # 'results' key exists; a body that parses to the end without one
+        # (e.g. an {"error": ...} answer) must lose the mirror race just
+        # like in the non-streaming branch
+        buffered = bytearray()
+        try:
+            async for chunk in response.aiter_bytes():
+                if buffered is not None:
+                    buffered.extend(chunk)
+                parser.send(chunk)
+                if results and buffered is not None:
+                    buffered = None
+                if len(results) >= MAX_SEARCH_RESULTS:
+                    break
+        except Exception as e:
+            raise RuntimeError(f"{url} returned malformed JSON") from e
+        finally:
+            # Closing a parser fed a truncated document raises; after an
+            # early break that is expected, not an error
+            try:
+                parser.close()
+            except Exception:
+                pass
+        if not results:
+            payload = _json_loads(bytes(buffered))
+            if 'results' not in payload:
+                raise RuntimeError(f"{url} returned a malformed response")
+            return payload
+        return {"results": list(results)}
+
+
+async def _search_any_mirror(post_data):
+    """Race the query against every mirror and keep the first success.
+
+    Losing and still-pending requests are cancelled as soon as one mirror
+    answers; only when every mirror fails does the last error propagate.
+    """
+    pending = {asyncio.create_task(_query_mirror(url, post_data))
+               for url in SEARXNG_MIRRORS}
+    last_error = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                try:
+                    return task.result()
+                except Exception as e:
+                    last_error = e
+    finally:
+        for task in pending:
+            task.cancel()
+    raise last_error
+
+async def search_function(params):
+    """
+    Coroutine that uses SearxNG to search the web for information.
+
+    Args:
+        params (dict): Dictionary containing the search parameters,
+                      with at least a "query" key.
+
+    Returns:
+        str: Formatted search results or error message.
+    """
+    query = params.get("query", "")
+    if not query:
+        return "Error: No search query provided."
+
+    # Whitespace-normalized, case-folded key so trivially restated
+    # queries hit the same entry
+    cache_key = " ".join(query.lower().split())
+    cached = _search_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    # Define the search query parameters
+    post_data = {
+        "q": query,
+        "format": "json",
+    }
+
+    try:
+        # Race the mirrors and take the first well-formed answer; awaiting
+        # here lets the event loop run other work during the round-trip
+        search_results = await _search_any_mirror(post_data)
+
+        # Format the results: collect parts and join once instead of
+        # growing a string with repeated concatenation
+        if 'results' in search_results and search_results['results']:
+            parts = ["Search Results:\n\n"]
+
+            # Take the top results or fewer if less are available
+            shown = search_results['results'][:MAX_SEARCH_RESULTS]
+            for i, result in enumerate(shown, 1):
+                row = {**_RESULT_DEFAULTS, **result, "i": i}
+                row["content"] = row["content"].strip()
+                parts.append(_RESULT_TEMPLATE.format_map(row))
+
+            parts.append(f"Total results shown: {len(shown)}")
+            formatted_results = "".join(parts)
+            # Only successful, non-empty responses are worth remembering
+            _search_cache.set(cache_key, formatted_results)
+        else:
+            formatted_results = f"No results found for query: {query}"
+
+        return formatted_results
+
+    except Exception as e:
+        return f"Error performing search: {str(e)}"
+
+# Names the calculator exposes to expressions
+_SAFE_MATH = {
+    "abs": abs, "round": round, "min": min, "max": max,
+    "sqrt": math.sqrt, "log": math.log, "exp": math.exp,
+    "sin": math.sin, "cos": math.cos, "tan": math.tan,
+    "floor": math.floor, "ceil": math.ceil,
+    "pi": math.pi, "e": math.e,
+}
+
+# AST nodes an arithmetic expression may contain. Anything outside this
+# set -- attribute access, subscripts, comprehensions, lambdas -- is
+# rejected before compilation, because stripping builtins alone does not
+# stop escapes built from object introspection chains.
+_SAFE_NODES = (
+    ast.Expression, ast.Constant, ast.Tuple, ast.List,
+    ast.BinOp, ast.UnaryOp, ast.Compare, ast.BoolOp,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow,
+    ast.USub, ast.UAdd,
+    ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.Eq, ast.NotEq,
+    ast.And, ast.Or, ast.Not,
+    ast.Load,
+)
+
+
+@functools.lru_cache(maxsize=512)
+def _compile_expression(expression):
+    """Validate and compile an arithmetic expression, memoized per string.
+
+    The parsed tree is walked and only arithmetic node types, names from
+    _SAFE_MATH, and direct calls to those names are allowed through.
+    """
+    tree = ast.parse(expression, mode="eval")
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name):
+            if node.id not in _SAFE_MATH:
+                raise ValueError(f"name {node.id!r} is not allowed")
+        elif isinstance(node, ast.Call):
+            if not (isinstance(node.func, ast.Name) and node.func.id in _SAFE_MATH):
+                raise ValueError("only calls to whitelisted math functions are allowed")
+            if node.keywords:
+                raise ValueError("keyword arguments are not allowed")
+        elif not isinstance(node, _SAFE_NODES):
+            raise ValueError(f"{type(node).__name__} is not allowed in expressions")
+    return compile(tree, "<calc>", "eval")
+
+
+def calculate_function(params):
+    """
+    Evaluate an arithmetic expression when the action is "calculate".
+
+    Expressions are compiled once and cached, so repeated calculations
+    skip the parser; evaluation runs with no builtins and only the
+    whitelisted math names visible.
+    """
+    expression = params.get("expression", "")
+    print(f"Calculating: {expression}")
+    try:
+        code = _compile_expression(expression)
+        result = eval(code, {"__builtins__": {}}, _SAFE_MATH)
+        return f"Result: {result}"
+    except Exception as e:
+        return f"Could not calculate expression: {str(e)}"
+
+# Usage example
+if __name__ == "__main__":
+    # Get openrouter API key from environment variable or prompt the user;
+    # .env is only read when the real environment lacks the key, so
+    # containerized/CI runs skip the file scan and parse entirely
+    openrouter_api_key = os.environ.get("OPENROUTER_API_KEY")
+
+    if not openrouter_api_key:
+        from dotenv import load_dotenv
+        load_dotenv()
+        openrouter_api_key = os.environ.get("OPENROUTER_API_KEY")
+
+    if not openrouter_api_key:
+        openrouter_api_key = input("Please enter your openrouter API key: ")
+        if not openrouter_api_key:
+            print("Error: openrouter API key is required.")
+            exit(1)
+    
+    # Prompt user for dev mode
+    dev_mode_input = input("Enable development mode with detailed logging? (y/n): ").strip().lower()
+    dev_mode = dev_mode_input in ['y', 'yes']
+    
+    if dev_mode:
+        print("Starting agent in DEVELOPMENT mode - detailed logs will be shown")
+    
+    # Create the agent with the API key and dev mode flag
+    agent = AIAgent("agent_config.toml", api_key=openrouter_api_key, dev_mode=dev_mode)
+    
+    # Register available actions
+    agent.register_actions({
+        "search": search_function,
+        "calculate": calculate_function,
+    })
+    
+    # Start the agent with an initial user input and close the shared
+    # HTTP session before the event loop goes away
+    async def _main():
+        try:
+            await agent.run("Hello, I need some help.")
+        finally:
+            await _close_session()
+
+    asyncio.run(_main())
\ No newline at end of file
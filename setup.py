@@ -0,0 +1,22 @@
+import os
+from setuptools import setup
+
+# Optionally compile the agent hot loop (agent.py) with Cython in pure-Python
+# mode. This is strictly opt-in: set SIMPLEST_AGENT_ENABLE_SPEEDUPS=true and
+# have Cython installed, otherwise the plain .py module is used unchanged.
+ext_modules = []
+if os.environ.get("SIMPLEST_AGENT_ENABLE_SPEEDUPS", "").lower() in ("1", "true", "yes"):
+    try:
+        from Cython.Build import cythonize
+        ext_modules = cythonize(["agent.py"], language_level=3)
+    except ImportError:
+        print("SIMPLEST_AGENT_ENABLE_SPEEDUPS is set but Cython is not installed; "
+              "falling back to the pure-Python module.")
+
+setup(
+    name="simplest-agent",
+    version="0.1.0",
+    description="A lightweight, configurable state machine for building LLM-powered agents",
+    py_modules=["agent"],
+    ext_modules=ext_modules,
+)